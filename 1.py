@@ -1,25 +1,78 @@
+import argparse
+import csv
+import heapq
+import itertools
+import json
+import mmap
+import os
 import random
 import sys
-from typing import List, Tuple, Optional
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+from typing import Dict, Iterator, List, NamedTuple, Optional, Sequence, Tuple, Union
 
 class Puzzle15:
-    def __init__(self):
-        """Инициализация игрового поля"""
-        self.size = 4
-        self.board = []
-        self.empty_pos = (3, 3)  # начальная позиция пустой клетки (правый нижний угол)
-        self.init_board()
+    # Компактное состояние (без __dict__, плитки - байты): на сервере живут
+    # сотни тысяч партий, поле 4x4 занимает 16 байт вместо списка списков
+    __slots__ = ('size', 'tiles', 'blank', 'misplaced', 'manhattan', 'optimal_moves')
+
+    def __init__(self, size: int = 4, difficulty=None):
+        """
+        Инициализация игрового поля
+
+        Args:
+            size: размер стороны поля (4 - классическая головоломка "15")
+            difficulty: сложность для поля 4x4 - название из DIFFICULTY_BANDS
+                или диапазон (мин, макс) длины оптимального решения
+        """
+        self.size = size
+        self.tiles = bytearray(size * size)  # плитки по строкам, 0 - пустая клетка
+        self.blank = size * size - 1  # начальная позиция пустой клетки (правый нижний угол)
+        self.misplaced = 0  # количество плиток не на своих местах
+        self.manhattan = 0  # сумма манхэттенских расстояний плиток до их мест
+        self.optimal_moves = None  # длина оптимального решения, если известна
+        self.init_board(difficulty)
         
-    def init_board(self):
+    def init_board(self, difficulty=None):
         """Инициализация игрового поля в решаемом состоянии"""
+        if difficulty is not None:
+            # Берем готовую позицию нужной сложности из пула (пул только для 4x4)
+            if self.size != 4:
+                raise ValueError(f"сложность задается только для поля 4x4, а не {self.size}x{self.size}")
+            low, high = difficulty_band(difficulty)
+            tiles, self.optimal_moves = get_board_pool().take(low, high)
+            self.from_packed(PackedBoard.from_tiles(tiles, self.size))
+            return
+        
         # Создаем упорядоченное поле
-        self.board = [[i * self.size + j + 1 for j in range(self.size)] 
-                     for i in range(self.size)]
-        self.board[self.size-1][self.size-1] = 0  # пустая клетка
+        cells = self.size * self.size
+        self.tiles = bytearray(range(1, cells + 1))
+        self.tiles[cells - 1] = 0  # пустая клетка
+        self.blank = cells - 1
+        self.recount()
         
         # Перемешиваем поле, совершая случайные допустимые ходы
         self.shuffle_board()
         
+    @property
+    def board(self) -> List[List[int]]:
+        """Поле в виде списка строк (строится по self.tiles)"""
+        size = self.size
+        return [list(self.tiles[i * size:(i + 1) * size]) for i in range(size)]
+
+    @board.setter
+    def board(self, board: List[List[int]]):
+        self.tiles = bytearray(tile for row in board for tile in row)
+        self.blank = self.tiles.index(0)
+        self.recount()
+
+    @property
+    def empty_pos(self) -> Tuple[int, int]:
+        """Позиция пустой клетки (строка, столбец)"""
+        return divmod(self.blank, self.size)
+
     def shuffle_board(self, moves: int = 1000):
         """Перемешивание игрового поля, совершая случайные допустимые ходы"""
         directions = [(0, 1), (0, -1), (1, 0), (-1, 0)]  # вправо, влево, вниз, вверх
@@ -50,6 +103,9 @@ class Puzzle15:
         Returns:
             bool: True если ход выполнен, False если ход невозможен
         """
+        # Координаты вне поля: в плоском массиве они попали бы в другую строку
+        if not (0 <= row < self.size and 0 <= col < self.size):
+            return False
         empty_row, empty_col = self.empty_pos
         
         # Проверяем, что плитка соседствует с пустой клеткой
@@ -57,22 +113,38 @@ class Puzzle15:
             return False
         
         # Меняем местами плитку и пустую клетку
-        self.board[empty_row][empty_col] = self.board[row][col]
-        self.board[row][col] = 0
-        self.empty_pos = (row, col)
+        cell = row * self.size + col
+        tile = self.tiles[cell]
+        self.tiles[self.blank] = tile
+        self.tiles[cell] = 0
+        self.blank = cell
+        
+        # Обновляем счетчики только для перемещенной плитки
+        goal_row, goal_col = divmod(tile - 1, self.size)
+        self.misplaced += (row == goal_row and col == goal_col) - \
+                          (empty_row == goal_row and empty_col == goal_col)
+        self.manhattan += abs(empty_row - goal_row) + abs(empty_col - goal_col) - \
+                          abs(row - goal_row) - abs(col - goal_col)
         return True
     
+    def recount(self):
+        """Полный пересчет счетчиков после прямого изменения self.tiles"""
+        self.misplaced = 0
+        self.manhattan = 0
+        for cell, tile in enumerate(self.tiles):
+            if tile and cell != tile - 1:
+                i, j = divmod(cell, self.size)
+                goal_row, goal_col = divmod(tile - 1, self.size)
+                self.misplaced += 1
+                self.manhattan += abs(i - goal_row) + abs(j - goal_col)
+    
     def is_solved(self) -> bool:
-        """Проверка, решена ли головоломка"""
-        for i in range(self.size):
-            for j in range(self.size):
-                if i == self.size - 1 and j == self.size - 1:
-                    if self.board[i][j] != 0:
-                        return False
-                else:
-                    if self.board[i][j] != i * self.size + j + 1:
-                        return False
-        return True
+        """Проверка, решена ли головоломка (O(1) по счетчику плиток не на местах)"""
+        return self.misplaced == 0
+    
+    def heuristic(self) -> int:
+        """Сумма манхэттенских расстояний плиток до их мест (O(1))"""
+        return self.manhattan
     
     def get_possible_moves(self) -> List[Tuple[int, int]]:
         """Получение списка возможных ходов"""
@@ -89,52 +161,1524 @@ class Puzzle15:
     
     def display_board(self):
         """Отображение игрового поля"""
+        width = max(2, len(str(self.size * self.size - 1)))
         print("\n" + "="*25)
-        print("   ГОЛОВОЛОМКА '15'")
+        print(f"   ГОЛОВОЛОМКА '{self.size * self.size - 1}'")
         print("="*25)
         
+        board = self.board
         for i in range(self.size):
-            print("+----" * self.size + "+")
+            print(("+" + "-" * (width + 2)) * self.size + "+")
             print("|", end="")
             for j in range(self.size):
-                if self.board[i][j] == 0:
-                    print("    |", end="")
+                if board[i][j] == 0:
+                    print(" " * (width + 2) + "|", end="")
                 else:
-                    print(f" {self.board[i][j]:2d} |", end="")
+                    print(f" {board[i][j]:{width}d} |", end="")
             print()
-        print("+----" * self.size + "+")
+        print(("+" + "-" * (width + 2)) * self.size + "+")
         
         # Показываем возможные ходы
         possible_moves = self.get_possible_moves()
         print("\nВозможные ходы (координаты строки и столбца):")
         for row, col in possible_moves:
-            print(f"  ({row}, {col}) - плитка {self.board[row][col]}")
+            print(f"  ({row}, {col}) - плитка {board[row][col]}")
     
-    def get_input_coordinates(self) -> Optional[Tuple[int, int]]:
-        """Получение координат от пользователя"""
+    def get_input_coordinates(self) -> Optional[Union[Tuple[int, int], str]]:
+        """
+        Получение координат от пользователя
+
+        Returns:
+            tuple: (строка, столбец), команда 'hint' или 'quit',
+            None при ошибке ввода
+        """
         try:
             print("\nВведите координаты плитки для перемещения")
-            row = int(input("Строка (0-3): "))
-            col = int(input("Столбец (0-3): "))
+            text = input(f"Строка (0-{self.size - 1}): ").strip().lower()
+            if text in ['h', 'hint', 'подсказка', '?']:
+                return 'hint'
+            if text in ['q', 'quit', 'выход']:
+                return 'quit'
+            row = int(text)
+            col = int(input(f"Столбец (0-{self.size - 1}): "))
             
             if 0 <= row < self.size and 0 <= col < self.size:
                 return (row, col)
             else:
-                print("Координаты должны быть от 0 до 3!")
+                print(f"Координаты должны быть от 0 до {self.size - 1}!")
                 return None
         except ValueError:
             print("Пожалуйста, введите числа!")
             return None
 
-def main():
-    """Основная функция игры"""
+    def to_packed(self) -> 'PackedBoard':
+        """Упаковка текущего поля в PackedBoard"""
+        return PackedBoard.from_tiles(self.tiles, self.size)
+
+    def from_packed(self, packed: 'PackedBoard'):
+        """Загрузка поля из PackedBoard"""
+        self.size = packed.size
+        self.tiles = bytearray(packed.to_tiles())
+        self.blank = packed.blank
+        self.recount()
+
+    def solve(self, heuristic=None, max_nodes: Optional[int] = None) -> Optional['SolveResult']:
+        """
+        Поиск оптимального решения текущей позиции алгоритмом IDA*
+
+        Args:
+            heuristic: эвристика (по умолчанию база шаблонов, если она построена,
+                иначе Манхэттен + линейные конфликты)
+            max_nodes: ограничение на количество раскрытых узлов
+
+        Returns:
+            SolveResult: ходы в формате move_tile(row, col) и статистика поиска,
+            None если ограничение на узлы исчерпано
+        """
+        tiles = list(self.tiles)
+        return solve_tiles(tiles, self.size, heuristic, max_nodes)
+
+    def solve_fast(self, weight: float = 2.0, max_nodes: Optional[int] = None,
+                   time_limit: Optional[float] = None) -> Optional['SolveResult']:
+        """
+        Быстрое неоптимальное решение для больших полей (5x5 и больше)
+
+        Args:
+            weight: вес эвристики во взвешенном A*
+            max_nodes: ограничение на количество раскрытых узлов
+            time_limit: ограничение по времени в секундах
+
+        Returns:
+            SolveResult или None, если ограничение исчерпано
+        """
+        tiles = list(self.tiles)
+        return solve_tiles_fast(tiles, self.size, weight, max_nodes, time_limit)
+
+
+class SolveResult(NamedTuple):
+    """Результат решения головоломки"""
+    moves: List[Tuple[int, int]]  # координаты плиток в порядке перемещения
+    nodes: int                    # количество раскрытых узлов
+    elapsed: float                # время поиска в секундах
+
+    @property
+    def nodes_per_sec(self) -> float:
+        """Скорость поиска (узлов в секунду)"""
+        return self.nodes / self.elapsed if self.elapsed > 0 else float(self.nodes)
+
+
+def goal_tiles(size: int) -> List[int]:
+    """Целевое состояние в виде плоского списка (0 - пустая клетка)"""
+    return list(range(1, size * size)) + [0]
+
+
+def is_solvable(tiles: Sequence[int], size: int) -> bool:
+    """Проверка решаемости позиции по четности перестановки"""
+    numbers = [tile for tile in tiles if tile]
+    inversions = sum(1 for i in range(len(numbers))
+                     for j in range(i + 1, len(numbers)) if numbers[i] > numbers[j])
+    if size % 2:
+        return inversions % 2 == 0
+    # Для четного размера учитываем строку пустой клетки, считая снизу
+    blank_row_from_bottom = size - tiles.index(0) // size
+    return (inversions + blank_row_from_bottom) % 2 == 1
+
+
+def get_neighbours(size: int) -> List[Tuple[int, ...]]:
+    """Соседние клетки для каждой клетки плоского поля"""
+    neighbours = []
+    for cell in range(size * size):
+        row, col = divmod(cell, size)
+        cells = []
+        for dr, dc in [(0, 1), (0, -1), (1, 0), (-1, 0)]:
+            new_row, new_col = row + dr, col + dc
+            if 0 <= new_row < size and 0 <= new_col < size:
+                cells.append(new_row * size + new_col)
+        neighbours.append(tuple(cells))
+    return neighbours
+
+
+class PackedBoard:
+    """
+    Компактное неизменяемое поле: все плитки упакованы в одно целое число
+
+    Клетка i занимает биты [i * bits, (i + 1) * bits), для поля 4x4 это
+    4 бита на плитку и 64 бита на поле. Позиция пустой клетки хранится
+    отдельно, поэтому ход - это пара сдвигов и масок, сравнение с целью -
+    одно сравнение чисел, а хэш - само число.
+    """
+
+    __slots__ = ('state', 'blank', 'size', '_layout')
+
+    # Общие для всех полей одного размера таблицы:
+    # (бит на клетку, маска клетки, соседи клеток, упакованная цель)
+    _layouts: Dict[int, tuple] = {}
+
+    def __init__(self, state: int, blank: int, size: int = 4):
+        self.state = state
+        self.blank = blank
+        self.size = size
+        self._layout = self._layouts.get(size) or self._make_layout(size)
+
+    @classmethod
+    def _make_layout(cls, size: int) -> tuple:
+        bits = max(4, (size * size - 1).bit_length())
+        goal = 0
+        for cell, tile in enumerate(goal_tiles(size)):
+            goal |= tile << (cell * bits)
+        layout = cls._layouts[size] = (bits, (1 << bits) - 1, get_neighbours(size), goal)
+        return layout
+
+    @classmethod
+    def from_tiles(cls, tiles: Sequence[int], size: int = 4) -> 'PackedBoard':
+        """Упаковка плоского списка плиток"""
+        board = cls(0, list(tiles).index(0), size)
+        bits = board._layout[0]
+        for cell, tile in enumerate(tiles):
+            board.state |= tile << (cell * bits)
+        return board
+
+    @classmethod
+    def goal(cls, size: int = 4) -> 'PackedBoard':
+        """Решенное поле"""
+        board = cls(0, size * size - 1, size)
+        board.state = board._layout[3]
+        return board
+
+    def to_tiles(self) -> List[int]:
+        """Распаковка в плоский список плиток"""
+        bits, mask, _, _ = self._layout
+        return [(self.state >> (cell * bits)) & mask for cell in range(self.size * self.size)]
+
+    def tile_at(self, cell: int) -> int:
+        """Плитка в клетке"""
+        bits, mask, _, _ = self._layout
+        return (self.state >> (cell * bits)) & mask
+
+    def neighbours(self) -> Tuple[int, ...]:
+        """Клетки плиток, которые можно сдвинуть на пустое место"""
+        return self._layout[2][self.blank]
+
+    def move(self, cell: int) -> Optional['PackedBoard']:
+        """
+        Перемещение плитки из клетки на пустое место
+
+        Returns:
+            PackedBoard: новое поле, None если плитка не соседствует с пустой клеткой
+        """
+        bits, mask, neighbours, _ = self._layout
+        if cell not in neighbours[self.blank]:
+            return None
+        shift = cell * bits
+        tile = (self.state >> shift) & mask
+        # Пустая клетка содержит 0, поэтому достаточно вычесть и прибавить плитку
+        return PackedBoard(self.state - (tile << shift) + (tile << (self.blank * bits)),
+                           cell, self.size)
+
+    def is_solved(self) -> bool:
+        """Проверка, решена ли головоломка"""
+        return self.state == self._layout[3]
+
+    def __eq__(self, other) -> bool:
+        return isinstance(other, PackedBoard) and self.state == other.state and self.size == other.size
+
+    def __hash__(self) -> int:
+        return hash(self.state)
+
+    def __repr__(self) -> str:
+        return f"PackedBoard(0x{self.state:x}, blank={self.blank}, size={self.size})"
+
+
+def _line_conflict(goals: List[int]) -> int:
+    """
+    Штраф линейного конфликта для одной линии
+
+    Args:
+        goals: целевые позиции (внутри линии) плиток, стоящих в своей линии
+
+    Returns:
+        int: 2 хода за каждую плитку, которую нужно убрать из линии,
+        чтобы остальные шли по возрастанию
+    """
+    # Длина наибольшей возрастающей подпоследовательности
+    longest = [1] * len(goals)
+    for i in range(len(goals)):
+        for j in range(i):
+            if goals[j] < goals[i] and longest[j] + 1 > longest[i]:
+                longest[i] = longest[j] + 1
+    return 2 * (len(goals) - max(longest, default=0))
+
+
+class ManhattanConflictHeuristic:
+    """
+    Манхэттенское расстояние с учетом линейных конфликтов
+
+    Эвристика вызывается как функция от плоского поля, а метод delta
+    пересчитывает оценку после одного хода за O(size).
+    """
+
+    def __init__(self, size: int = 4):
+        self.size = size
+        cells = size * size
+        # distance[tile][cell] - расстояние плитки от клетки до ее цели
+        self.distance = [[0] * cells for _ in range(cells)]
+        for tile in range(1, cells):
+            goal_row, goal_col = divmod(tile - 1, size)
+            for cell in range(cells):
+                row, col = divmod(cell, size)
+                self.distance[tile][cell] = abs(row - goal_row) + abs(col - goal_col)
+        # Кэши конфликтов по содержимому строки/столбца
+        self._row_cache: List[Dict[tuple, int]] = [{} for _ in range(size)]
+        self._col_cache: List[Dict[tuple, int]] = [{} for _ in range(size)]
+
+    def _row_conflict(self, row: int, line: tuple) -> int:
+        cache = self._row_cache[row]
+        value = cache.get(line)
+        if value is None:
+            size = self.size
+            goals = [(tile - 1) % size for tile in line
+                     if tile and (tile - 1) // size == row]
+            value = cache[line] = _line_conflict(goals)
+        return value
+
+    def _col_conflict(self, col: int, line: tuple) -> int:
+        cache = self._col_cache[col]
+        value = cache.get(line)
+        if value is None:
+            size = self.size
+            goals = [(tile - 1) // size for tile in line
+                     if tile and (tile - 1) % size == col]
+            value = cache[line] = _line_conflict(goals)
+        return value
+
+    def __call__(self, tiles: Sequence[int]) -> int:
+        """Полная оценка расстояния до цели"""
+        size = self.size
+        estimate = sum(self.distance[tile][cell] for cell, tile in enumerate(tiles) if tile)
+        for i in range(size):
+            estimate += self._row_conflict(i, tuple(tiles[i * size:(i + 1) * size]))
+            estimate += self._col_conflict(i, tuple(tiles[i::size]))
+        return estimate
+
+    def delta(self, tiles: List[int], pos: List[int], tile: int, src: int, dst: int) -> int:
+        """
+        Изменение оценки при перемещении плитки
+
+        Args:
+            tiles: текущее поле (до хода)
+            pos: позиции плиток (pos[tile] == клетка)
+            tile: перемещаемая плитка
+            src: клетка плитки
+            dst: пустая клетка, куда плитка переезжает
+
+        Returns:
+            int: разница оценок после и до хода
+        """
+        size = self.size
+        change = self.distance[tile][dst] - self.distance[tile][src]
+        if src - dst == size or dst - src == size:
+            # Вертикальный ход: меняется состав двух строк, но учитывается
+            # только строка, являющаяся целевой для плитки
+            goal_row = (tile - 1) // size
+            if goal_row == src // size:
+                start = goal_row * size
+                line = tiles[start:start + size]
+                before = tuple(line)
+                line[src - start] = 0
+                change += self._row_conflict(goal_row, tuple(line)) - self._row_conflict(goal_row, before)
+            elif goal_row == dst // size:
+                start = goal_row * size
+                line = tiles[start:start + size]
+                before = tuple(line)
+                line[dst - start] = tile
+                change += self._row_conflict(goal_row, tuple(line)) - self._row_conflict(goal_row, before)
+        else:
+            # Горизонтальный ход: аналогично для столбцов
+            goal_col = (tile - 1) % size
+            if goal_col == src % size:
+                line = tiles[goal_col::size]
+                before = tuple(line)
+                line[src // size] = 0
+                change += self._col_conflict(goal_col, tuple(line)) - self._col_conflict(goal_col, before)
+            elif goal_col == dst % size:
+                line = tiles[goal_col::size]
+                before = tuple(line)
+                line[dst // size] = tile
+                change += self._col_conflict(goal_col, tuple(line)) - self._col_conflict(goal_col, before)
+        return change
+
+
+# Разбиения плиток для аддитивной базы шаблонов (поле 4x4)
+PDB_PARTITIONS = {
+    '555': ((1, 2, 3, 5, 6), (4, 7, 8, 11, 12), (9, 10, 13, 14, 15)),
+    '663': ((1, 5, 6, 9, 10, 13), (7, 8, 11, 12, 14, 15), (2, 3, 4)),
+}
+PDB_MAGIC = b'P15PDB'
+PDB_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'puzzle15_pdb.bin')
+
+
+def build_pattern_table(pattern: Sequence[int]) -> bytearray:
+    """
+    Построение таблицы одного шаблона обратным поиском в ширину от цели
+
+    Индекс таблицы - позиции плиток шаблона, упакованные по 4 бита.
+    Учитываются только ходы плиток шаблона, поэтому таблицы разных
+    шаблонов можно складывать.
+
+    Args:
+        pattern: номера плиток шаблона
+
+    Returns:
+        bytearray: минимальное число ходов плиток шаблона для каждой расстановки
+    """
+    size = 4
+    cells = size * size
+    k = len(pattern)
+    neighbours = get_neighbours(size)
+    table = bytearray(b'\xff') * (cells ** k)
+    # seen[index * cells + blank]: бит 1 - область пустой клетки обработана,
+    # бит 2 - состояние уже поставлено в очередь
+    seen = bytearray(cells ** k * cells)
+    shifts = [4 * (k - 1 - j) for j in range(k)]
+
+    frontier = [(tuple(tile - 1 for tile in pattern), cells - 1)]
+    depth = 0
+    while frontier:
+        next_frontier = []
+        for positions, blank in frontier:
+            occupied = 0
+            index = 0
+            for cell in positions:
+                occupied |= 1 << cell
+                index = (index << 4) | cell
+            # Пустая клетка свободно ходит по области без плиток шаблона
+            region = [blank]
+            region_mask = (1 << blank) | occupied
+            for cell in region:
+                for near in neighbours[cell]:
+                    if not region_mask >> near & 1:
+                        region_mask |= 1 << near
+                        region.append(near)
+            key = index * cells + min(region)
+            if seen[key] & 1:
+                continue
+            seen[key] |= 1
+            if table[index] > depth:
+                table[index] = depth
+            # Ход плитки шаблона в область пустой клетки стоит 1
+            for cell in region:
+                for near in neighbours[cell]:
+                    if occupied >> near & 1:
+                        j = positions.index(near)
+                        new_index = index + ((cell - near) << shifts[j])
+                        new_key = new_index * cells + near
+                        if not seen[new_key]:
+                            seen[new_key] = 2
+                            moved = list(positions)
+                            moved[j] = cell
+                            next_frontier.append((tuple(moved), near))
+        frontier = next_frontier
+        depth += 1
+    return table
+
+
+def build_pattern_database(partition: str = '555', path: str = PDB_PATH):
+    """
+    Построение аддитивной базы шаблонов и сохранение в файл
+
+    Формат файла: заголовок с описанием разбиения, затем таблицы
+    шаблонов подряд, по одному байту на расстановку.
+    """
+    patterns = PDB_PARTITIONS[partition]
+    header = PDB_MAGIC + b' ' + ';'.join(
+        ','.join(str(tile) for tile in pattern) for pattern in patterns).encode() + b'\n'
+    total_start = time.perf_counter()
+    with open(path + '.tmp', 'wb') as output:
+        output.write(header)
+        for pattern in patterns:
+            start = time.perf_counter()
+            table = build_pattern_table(pattern)
+            output.write(table)
+            print(f"Шаблон {pattern}: {len(table):,} байт, "
+                  f"максимум {max(value for value in table if value != 255)} ходов, "
+                  f"{time.perf_counter() - start:.1f} с")
+    os.replace(path + '.tmp', path)
+    print(f"База шаблонов '{partition}' сохранена в {path}: "
+          f"{os.path.getsize(path):,} байт, {time.perf_counter() - total_start:.1f} с")
+
+
+class PatternDatabaseHeuristic:
+    """
+    Аддитивная база шаблонов, отображенная в память
+
+    Файл открывается через mmap, поэтому загрузка мгновенная, а процессы,
+    читающие один файл, разделяют страницы памяти.
+    """
+
+    def __init__(self, path: str = PDB_PATH):
+        with open(path, 'rb') as source:
+            self._mmap = mmap.mmap(source.fileno(), 0, access=mmap.ACCESS_READ)
+        header_end = self._mmap.find(b'\n')
+        magic, spec = bytes(self._mmap[:header_end]).split(b' ')
+        if magic != PDB_MAGIC:
+            raise ValueError(f"{path} не является базой шаблонов")
+        self.patterns = [tuple(int(tile) for tile in part.split(b','))
+                         for part in spec.split(b';')]
+        view = memoryview(self._mmap)
+        offset = header_end + 1
+        self.size = 4
+        self.tables = []
+        # Для каждой плитки: таблица ее шаблона, плитки шаблона и сдвиг в индексе
+        self._tile_info = [None] * 16
+        for pattern in self.patterns:
+            length = 16 ** len(pattern)
+            table = view[offset:offset + length]
+            offset += length
+            self.tables.append(table)
+            for j, tile in enumerate(pattern):
+                self._tile_info[tile] = (table, pattern, 4 * (len(pattern) - 1 - j))
+
+    def __call__(self, tiles: Sequence[int]) -> int:
+        """Полная оценка расстояния до цели"""
+        pos = [0] * 16
+        for cell, tile in enumerate(tiles):
+            pos[tile] = cell
+        estimate = 0
+        for pattern, table in zip(self.patterns, self.tables):
+            index = 0
+            for tile in pattern:
+                index = (index << 4) | pos[tile]
+            estimate += table[index]
+        return estimate
+
+    def delta(self, tiles: List[int], pos: List[int], tile: int, src: int, dst: int) -> int:
+        """Изменение оценки при перемещении плитки (меняется только ее шаблон)"""
+        table, pattern, shift = self._tile_info[tile]
+        index = 0
+        for other in pattern:
+            index = (index << 4) | pos[other]
+        return table[index + ((dst - src) << shift)] - table[index]
+
+
+def load_pattern_database(path: str = PDB_PATH) -> Optional[PatternDatabaseHeuristic]:
+    """Загрузка базы шаблонов, None если файл еще не построен"""
+    if not os.path.exists(path):
+        return None
+    return PatternDatabaseHeuristic(path)
+
+
+EIGHT_TABLE_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'puzzle8_table.bin')
+EIGHT_STATES = 181440  # 9! / 2 решаемых позиций поля 3x3
+
+
+def rank_eight(tiles: Sequence[int]) -> int:
+    """
+    Совершенный хэш решаемой позиции 3x3 в диапазон [0, 9!/2)
+
+    Индекс = клетка пустой * 8!/2 + ранг Лемера плиток без пустой клетки.
+    На поле нечетного размера решаемость задается четностью перестановки
+    плиток, поэтому порядок двух последних плиток однозначен и в ранг
+    входят только первые шесть.
+    """
+    index = 0
+    used = 0
+    digits = 0
+    for tile in tiles:
+        if tile:
+            index = index * (8 - digits) + tile - 1 - (used & ((1 << tile) - 1)).bit_count()
+            used |= 1 << tile
+            digits += 1
+            if digits == 6:
+                break
+    return list(tiles).index(0) * (EIGHT_STATES // 9) + index
+
+
+def _iter_eight_distances() -> Iterator[Tuple[List[int], int]]:
+    """Обход всех решаемых позиций 3x3 в ширину от цели: (позиция, расстояние)"""
+    neighbours = get_neighbours(3)
+    seen = bytearray(EIGHT_STATES)
+    goal = goal_tiles(3)
+    seen[rank_eight(goal)] = 1
+    frontier = [(goal, 8)]
+    depth = 0
+    while frontier:
+        next_frontier = []
+        for tiles, blank in frontier:
+            yield tiles, depth
+            for cell in neighbours[blank]:
+                child = list(tiles)
+                child[blank], child[cell] = child[cell], 0
+                index = rank_eight(child)
+                if not seen[index]:
+                    seen[index] = 1
+                    next_frontier.append((child, cell))
+        frontier = next_frontier
+        depth += 1
+
+
+def build_eight_table(path: str = EIGHT_TABLE_PATH) -> bytes:
+    """Построение таблицы расстояний всех позиций 3x3 и сохранение в файл"""
+    start = time.perf_counter()
+    table = bytearray(EIGHT_STATES)
+    for tiles, depth in _iter_eight_distances():
+        table[rank_eight(tiles)] = depth
+    with open(path + '.tmp', 'wb') as output:
+        output.write(table)
+    os.replace(path + '.tmp', path)
+    print(f"Таблица 3x3: {EIGHT_STATES:,} позиций, максимум {max(table)} ходов, "
+          f"{time.perf_counter() - start:.1f} с, файл: {path}")
+    return bytes(table)
+
+
+class EightPuzzleTable:
+    """
+    Точные расстояния до решения для всех позиций поля 3x3
+
+    Расстояние - один поиск по индексу, лучший ход - не больше четырех.
+    """
+
+    def __init__(self, path: str = EIGHT_TABLE_PATH):
+        if os.path.exists(path):
+            with open(path, 'rb') as source:
+                self.table = source.read()
+        else:
+            self.table = build_eight_table(path)
+        self.neighbours = get_neighbours(3)
+
+    def distance(self, tiles: Sequence[int]) -> int:
+        """Оптимальное число ходов до решения"""
+        return self.table[rank_eight(tiles)]
+
+    def best_move(self, tiles: Sequence[int]) -> Optional[int]:
+        """Клетка плитки, ход которой приближает к решению (None, если решено)"""
+        tiles = list(tiles)
+        target = self.table[rank_eight(tiles)] - 1
+        if target < 0:
+            return None
+        blank = tiles.index(0)
+        for cell in self.neighbours[blank]:
+            tiles[blank], tiles[cell] = tiles[cell], 0
+            found = self.table[rank_eight(tiles)] == target
+            tiles[cell], tiles[blank] = tiles[blank], 0
+            if found:
+                return cell
+        return None
+
+    def solve(self, tiles: Sequence[int]) -> List[int]:
+        """Оптимальное решение: клетки перемещаемых плиток"""
+        tiles = list(tiles)
+        path = []
+        cell = self.best_move(tiles)
+        while cell is not None:
+            blank = tiles.index(0)
+            tiles[blank], tiles[cell] = tiles[cell], 0
+            path.append(cell)
+            cell = self.best_move(tiles)
+        return path
+
+
+def eight_table_command(args: List[str]):
+    """Построение таблицы 3x3 и проверка эвристик по точным расстояниям"""
+    build_eight_table()
+    heuristic = ManhattanConflictHeuristic(3)
+    total_ratio = 0.0
+    overestimates = 0
+    for tiles, depth in _iter_eight_distances():
+        estimate = heuristic(tiles)
+        overestimates += estimate > depth
+        total_ratio += estimate / depth if depth else 1.0
+    print(f"Манхэттен + конфликты на 3x3: переоценок {overestimates}, "
+          f"средняя доля от точного расстояния {total_ratio / EIGHT_STATES:.1%}")
+
+
+def ida_star(tiles: Sequence[int], size: int, heuristic,
+             max_nodes: Optional[int] = None,
+             time_limit: Optional[float] = None) -> Tuple[Optional[List[int]], int]:
+    """
+    Итеративное углубление A* (IDA*)
+
+    Args:
+        tiles: плоское поле (0 - пустая клетка)
+        size: размер стороны поля
+        heuristic: допустимая эвристика с методом delta
+        max_nodes: ограничение на количество раскрытых узлов
+        time_limit: ограничение по времени в секундах
+
+    Returns:
+        tuple: (список клеток перемещаемых плиток или None, раскрыто узлов)
+    """
+    tiles = list(tiles)
+    pos = [0] * len(tiles)
+    for cell, tile in enumerate(tiles):
+        pos[tile] = cell
+    goal = goal_tiles(size)
+    neighbours = get_neighbours(size)
+    delta = heuristic.delta
+    path: List[int] = []
+    nodes = 0
+    found = -1
+    limit = max_nodes if max_nodes is not None else sys.maxsize
+    deadline = time.perf_counter() + time_limit if time_limit is not None else None
+    exhausted = False
+
+    def search(blank: int, g: int, h: int, prev: int, bound: int) -> int:
+        nonlocal nodes, exhausted
+        if h == 0 and tiles == goal:
+            return found
+        nodes += 1
+        if nodes > limit or (deadline is not None and nodes & 1023 == 0
+                             and time.perf_counter() > deadline):
+            exhausted = True
+            return found
+        minimum = sys.maxsize
+        for cell in neighbours[blank]:
+            if cell == prev:
+                continue
+            tile = tiles[cell]
+            child_h = h + delta(tiles, pos, tile, cell, blank)
+            # Отсекаем потомка без входа в рекурсию
+            if g + 1 + child_h > bound:
+                if g + 1 + child_h < minimum:
+                    minimum = g + 1 + child_h
+                continue
+            tiles[blank] = tile
+            tiles[cell] = 0
+            pos[tile] = blank
+            path.append(cell)
+            result = search(cell, g + 1, child_h, blank, bound)
+            if result == found:
+                return found
+            path.pop()
+            tiles[cell] = tile
+            tiles[blank] = 0
+            pos[tile] = cell
+            if result < minimum:
+                minimum = result
+        return minimum
+
+    estimate = bound = heuristic(tiles)
+    while True:
+        result = search(pos[0], 0, estimate, -1, bound)
+        if result == found:
+            return (None if exhausted else path), nodes
+        bound = result
+
+
+def weighted_astar(tiles: Sequence[int], size: int, heuristic, weight: float = 2.0,
+                   max_nodes: Optional[int] = None,
+                   time_limit: Optional[float] = None) -> Tuple[Optional[List[int]], int]:
+    """
+    Взвешенный A* по всему полю: решение не длиннее weight * оптимума
+
+    Returns:
+        tuple: (список клеток перемещаемых плиток или None, раскрыто узлов)
+    """
+    neighbours = get_neighbours(size)
+    goal = tuple(goal_tiles(size))
+    start = tuple(tiles)
+    parents: Dict[tuple, Optional[Tuple[tuple, int]]] = {start: None}
+    costs = {start: 0}
+    heap = [(weight * heuristic(start), 0, start)]
+    deadline = time.perf_counter() + time_limit if time_limit is not None else None
+    nodes = 0
+    while heap:
+        _, g, state = heapq.heappop(heap)
+        if g > costs[state]:
+            continue
+        if state == goal:
+            path = []
+            while parents[state] is not None:
+                state, cell = parents[state]
+                path.append(cell)
+            path.reverse()
+            return path, nodes
+        nodes += 1
+        if (max_nodes is not None and nodes > max_nodes) or \
+                (deadline is not None and nodes & 255 == 0 and time.perf_counter() > deadline):
+            return None, nodes
+        blank = state.index(0)
+        for cell in neighbours[blank]:
+            child = list(state)
+            child[blank], child[cell] = child[cell], 0
+            child = tuple(child)
+            if g + 1 < costs.get(child, sys.maxsize):
+                costs[child] = g + 1
+                parents[child] = (state, cell)
+                heapq.heappush(heap, (g + 1 + weight * heuristic(child), g + 1, child))
+    return None, nodes
+
+
+def default_heuristic(size: int):
+    """База шаблонов для поля 4x4, если она построена, иначе Манхэттен + конфликты"""
+    if size == 4:
+        database = load_pattern_database()
+        if database is not None:
+            return database
+    return ManhattanConflictHeuristic(size)
+
+
+def solve_tiles(tiles: Sequence[int], size: int, heuristic=None,
+                max_nodes: Optional[int] = None,
+                time_limit: Optional[float] = None) -> Optional[SolveResult]:
+    """
+    Оптимальное решение плоского поля
+
+    Returns:
+        SolveResult или None, если ограничение по узлам или времени исчерпано
+
+    Raises:
+        ValueError: если позиция нерешаема
+    """
+    if not is_solvable(tiles, size):
+        raise ValueError("Позиция не имеет решения")
+    if heuristic is None:
+        heuristic = default_heuristic(size)
+    start = time.perf_counter()
+    path, nodes = ida_star(tiles, size, heuristic, max_nodes, time_limit)
+    elapsed = time.perf_counter() - start
+    if path is None:
+        return None
+    return SolveResult([divmod(cell, size) for cell in path], nodes, elapsed)
+
+
+def _subgoal_search(tiles: List[int], size: int, tracked: Sequence[int], locked: Sequence[bool],
+                    weight: float, max_nodes: Optional[int],
+                    deadline: Optional[float]) -> Tuple[Optional[List[int]], int]:
+    """
+    Взвешенный A* до расстановки отслеживаемых плиток на свои места
+
+    Состояние поиска - только позиции отслеживаемых плиток и пустой клетки,
+    остальные плитки неразличимы, поэтому память ограничена размером
+    незакрепленной области.
+
+    Returns:
+        tuple: (клетки перемещаемых плиток или None, раскрыто узлов)
+    """
+    neighbours = get_neighbours(size)
+    cells = size * size
+    distance = [[abs(a // size - b // size) + abs(a % size - b % size) for b in range(cells)]
+                for a in range(cells)]
+    goals = [tile - 1 for tile in tracked]
+    k = len(tracked)
+    newest_goal = goals[-1]
+
+    def estimate(state: tuple) -> float:
+        md = 0
+        for j in range(k):
+            md += distance[state[j]][goals[j]]
+        if md == 0:
+            return 0
+        # Подтягиваем пустую клетку к последней (еще не поставленной) плитке
+        newest = state[k - 1]
+        if newest != newest_goal:
+            md += distance[state[k]][newest] - 1
+        return weight * md
+
+    start = tuple(tiles.index(tile) for tile in tracked) + (tiles.index(0),)
+    parents: Dict[tuple, Optional[tuple]] = {start: None}
+    costs = {start: 0}
+    heap = [(estimate(start), 0, start)]
+    nodes = 0
+    while heap:
+        _, g, state = heapq.heappop(heap)
+        if g > costs[state]:
+            continue
+        nodes += 1
+        if (max_nodes is not None and nodes > max_nodes) or \
+                (deadline is not None and nodes & 1023 == 1 and time.perf_counter() > deadline):
+            return None, nodes
+        h = estimate(state)
+        if h == 0:
+            path = []
+            while parents[state] is not None:
+                path.append(state[k])
+                state = parents[state]
+            path.reverse()
+            return path, nodes
+        blank = state[k]
+        for cell in neighbours[blank]:
+            if locked[cell]:
+                continue
+            child = list(state)
+            for j in range(k):
+                if child[j] == cell:
+                    child[j] = blank
+                    break
+            child[k] = cell
+            child = tuple(child)
+            if g + 1 < costs.get(child, sys.maxsize):
+                costs[child] = g + 1
+                parents[child] = state
+                heapq.heappush(heap, (g + 1 + estimate(child), g + 1, child))
+    return None, nodes
+
+
+def solve_tiles_fast(tiles: Sequence[int], size: int, weight: float = 2.0,
+                     max_nodes: Optional[int] = None,
+                     time_limit: Optional[float] = None) -> Optional[SolveResult]:
+    """
+    Неоптимальное решение редукцией поля по строкам и столбцам
+
+    Плитки ставятся по одной: сначала верхняя строка оставшейся области,
+    затем ее левый столбец, после чего они закрепляются и область
+    уменьшается на единицу. Каждая подзадача решается взвешенным A*.
+
+    Returns:
+        SolveResult или None, если ограничение по узлам или времени исчерпано
+
+    Raises:
+        ValueError: если позиция нерешаема
+    """
+    if not is_solvable(tiles, size):
+        raise ValueError("Позиция не имеет решения")
+    start = time.perf_counter()
+    deadline = start + time_limit if time_limit is not None else None
+    tiles = list(tiles)
+    locked = [False] * (size * size)
+    path: List[int] = []
+    nodes = 0
+    for top in range(size - 1):
+        # Порядок расстановки: строка top слева направо, затем столбец top сверху вниз
+        order = [top * size + col for col in range(top, size)] + \
+                [row * size + top for row in range(top + 1, size)]
+        tracked: List[int] = []
+        for cell in order:
+            tracked.append(cell + 1)
+            remaining = None if max_nodes is None else max_nodes - nodes
+            moves, used = _subgoal_search(tiles, size, tracked, locked,
+                                          weight, remaining, deadline)
+            nodes += used
+            if moves is None:
+                return None
+            for moved in moves:
+                blank = tiles.index(0)
+                tiles[blank], tiles[moved] = tiles[moved], 0
+            path.extend(moves)
+        for cell in order:
+            locked[cell] = True
+    elapsed = time.perf_counter() - start
+    return SolveResult([divmod(cell, size) for cell in path], nodes, elapsed)
+
+
+def size_benchmark_command(args: List[str]):
+    """Время быстрого решения в зависимости от размера: python 1.py bench-sizes [размеры] [кол-во]"""
+    sizes = [int(size) for size in args[0].split(',')] if args else [3, 4, 5, 6, 7]
+    count = int(args[1]) if len(args) > 1 else 5
+    print(f"{'Размер':>8} {'Ходов':>8} {'Узлов':>10} {'Время, с':>10}")
+    for size in sizes:
+        results = []
+        for board in random_boards(count, seed=size, size=size).tolist():
+            results.append(solve_tiles_fast(board, size))
+        print(f"{size}x{size:<6} {sum(len(r.moves) for r in results) / count:8.1f} "
+              f"{sum(r.nodes for r in results) / count:10.0f} "
+              f"{sum(r.elapsed for r in results) / count:10.3f}")
+
+
+class HintEngine:
+    """
+    Подсказки "лучший следующий ход" с LRU-кэшем по упакованному полю
+
+    При промахе ищется решение в пределах бюджета времени, и в кэш
+    записывается следующий ход для каждой позиции вдоль решения, поэтому
+    игрок, следующий подсказкам, дальше получает их из кэша за O(1).
+    """
+
+    def __init__(self, capacity: int = 100000, time_budget: float = 0.1):
+        self.capacity = capacity
+        self.time_budget = time_budget
+        # (размер, поле) -> (ход, сколько ходов осталось по найденному решению)
+        self.cache: 'OrderedDict[Tuple[int, int], Tuple[Tuple[int, int], int]]' = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+        self.latencies: List[float] = []
+        self._heuristics: Dict[int, object] = {}
+        self._eight_table: Optional[EightPuzzleTable] = None
+
+    def _heuristic(self, size: int):
+        heuristic = self._heuristics.get(size)
+        if heuristic is None:
+            heuristic = self._heuristics[size] = default_heuristic(size)
+        return heuristic
+
+    def _find_path(self, tiles: List[int], size: int) -> Optional[List[int]]:
+        """Оптимальное решение, если успевает, иначе приближенное (None - бюджет исчерпан)"""
+        if size == 3:
+            if self._eight_table is None and os.path.exists(EIGHT_TABLE_PATH):
+                self._eight_table = EightPuzzleTable()
+            if self._eight_table is not None:
+                return self._eight_table.solve(tiles)
+        if size > 4:
+            result = solve_tiles_fast(tiles, size, time_limit=self.time_budget)
+            return None if result is None else [row * size + col for row, col in result.moves]
+        heuristic = self._heuristic(size)
+        start = time.perf_counter()
+        # Половина бюджета на оптимальный IDA*, четверть на взвешенный A*,
+        # остаток на быстрое решение по строкам и столбцам
+        path, _ = ida_star(tiles, size, heuristic, time_limit=self.time_budget / 2)
+        if path is None:
+            remaining = self.time_budget * 0.75 - (time.perf_counter() - start)
+            path, _ = weighted_astar(tiles, size, heuristic, time_limit=max(remaining, 0.0))
+        if path is None:
+            remaining = self.time_budget - (time.perf_counter() - start)
+            result = solve_tiles_fast(tiles, size, time_limit=max(remaining, 0.0))
+            path = None if result is None else [row * size + col for row, col in result.moves]
+        return path
+
+    def _greedy_move(self, tiles: List[int], size: int) -> int:
+        """
+        Жадный ход, когда решение не найдено за бюджет времени
+
+        Returns:
+            int: соседняя с пустой клетка, после хода из которой эвристика
+            минимальна (уменьшается, если такой ход есть)
+        """
+        heuristic = self._heuristic(size)
+        blank = tiles.index(0)
+        best_cell, best_value = None, None
+        for cell in get_neighbours(size)[blank]:
+            tiles[blank], tiles[cell] = tiles[cell], 0
+            value = heuristic(tiles)
+            tiles[cell], tiles[blank] = tiles[blank], 0
+            if best_value is None or value < best_value:
+                best_cell, best_value = cell, value
+        return best_cell
+
+    def hint(self, game: 'Puzzle15') -> Optional[Tuple[int, int]]:
+        """
+        Координаты плитки, которую стоит переместить следующей
+
+        Returns:
+            tuple: (строка, столбец) или None, если головоломка решена
+        """
+        start = time.perf_counter()
+        size = game.size
+        tiles = list(game.tiles)
+        key = (size, PackedBoard.from_tiles(tiles, size).state)
+        entry = self.cache.get(key)
+        move = None
+        if entry is not None:
+            self.hits += 1
+            self.cache.move_to_end(key)
+            move = entry[0]
+        elif not game.is_solved():
+            self.misses += 1
+            path = self._find_path(tiles, size)
+            if path is None:
+                # Решение не уложилось в бюджет: жадный ход, в кэш не записывается
+                move = divmod(self._greedy_move(tiles, size), size)
+            else:
+                # Запоминаем ход для позиций вдоль найденного решения (не больше
+                # емкости кэша); ближайшие к игроку записываем последними, чтобы
+                # при вытеснении первыми уходили дальние. Запись заменяется только
+                # более коротким остатком пути: иначе неоптимальные решения могли
+                # бы сцепиться в цикл
+                entries = []
+                blank = tiles.index(0)
+                for index, cell in enumerate(path[:self.capacity]):
+                    entries.append(((size, PackedBoard.from_tiles(tiles, size).state),
+                                    (divmod(cell, size), len(path) - index)))
+                    tiles[blank], tiles[cell] = tiles[cell], 0
+                    blank = cell
+                for entry_key, entry in reversed(entries):
+                    old = self.cache.get(entry_key)
+                    if old is None or entry[1] < old[1]:
+                        self.cache[entry_key] = entry
+                    self.cache.move_to_end(entry_key)
+                while len(self.cache) > self.capacity:
+                    self.cache.popitem(last=False)
+                move = divmod(path[0], size) if path else None
+        self.latencies.append(time.perf_counter() - start)
+        return move
+
+    def stats(self) -> str:
+        """Доля попаданий в кэш и задержки p50/p99"""
+        total = self.hits + self.misses
+        latencies = sorted(self.latencies) or [0.0]
+        p50 = latencies[len(latencies) // 2]
+        p99 = latencies[min(len(latencies) - 1, int(len(latencies) * 0.99))]
+        return (f"подсказок: {total}, попаданий в кэш: {self.hits / total if total else 0:.1%}, "
+                f"размер кэша: {len(self.cache)}, p50: {p50 * 1000:.2f} мс, p99: {p99 * 1000:.2f} мс")
+
+
+def hint_benchmark_command(args: List[str]):
+    """Игры по подсказкам для подбора размера кэша: python 1.py hint-bench [игр] [размер] [кэш]"""
+    games = int(args[0]) if args else 20
+    size = int(args[1]) if len(args) > 1 else 4
+    engine = HintEngine(capacity=int(args[2]) if len(args) > 2 else 100000)
+    max_moves = 20 * size ** 3  # жадные подсказки на больших полях могут зациклиться
+    unsolved = 0
+    for _ in range(games):
+        game = Puzzle15(size)
+        for _ in range(max_moves):
+            move = engine.hint(game)
+            if move is None:
+                break
+            game.move_tile(*move)
+        if not game.is_solved():
+            unsolved += 1
+    print(f"Поле {size}x{size}, игр: {games}, не решено за {max_moves} ходов: {unsolved}; {engine.stats()}")
+
+
+def solve_command(args: List[str]):
+    """Решение позиции из командной строки: python 1.py solve [16 чисел]"""
     game = Puzzle15()
+    if args:
+        tiles = [int(arg) for arg in args]
+        if sorted(tiles) != list(range(game.size * game.size)):
+            print(f"Нужно указать числа от 0 до {game.size * game.size - 1} без повторов!")
+            return
+        if not is_solvable(tiles, game.size):
+            print("Эта позиция не имеет решения!")
+            return
+        game.from_packed(PackedBoard.from_tiles(tiles, game.size))
+    game.display_board()
+    result = game.solve()
+    for row, col in result.moves:
+        game.move_tile(row, col)
+    print(f"\nОптимальное решение: {len(result.moves)} ходов")
+    print(f"Раскрыто узлов: {result.nodes}, {result.nodes_per_sec:,.0f} узлов/с, "
+          f"время: {result.elapsed:.2f} с")
+    print(f"Проверка на поле: {'решено' if game.is_solved() else 'ошибка'}")
+
+
+DIFFICULTY_BANDS = {
+    'easy': (10, 20),
+    'medium': (20, 30),
+    'hard': (30, 45),
+    'expert': (45, 55),
+}
+POOL_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'puzzle15_pool')
+
+
+def difficulty_band(difficulty) -> Tuple[int, int]:
+    """
+    Диапазон длины оптимального решения для сложности
+
+    Args:
+        difficulty: название из DIFFICULTY_BANDS или пара (мин, макс)
+
+    Returns:
+        tuple: (мин, макс)
+    """
+    if isinstance(difficulty, str):
+        if difficulty in DIFFICULTY_BANDS:
+            return DIFFICULTY_BANDS[difficulty]
+        raise ValueError(f"неизвестная сложность '{difficulty}', варианты: {', '.join(DIFFICULTY_BANDS)}")
+    try:
+        low, high = (int(value) for value in difficulty)
+    except (TypeError, ValueError):
+        raise ValueError(f"сложность - название или пара (мин, макс), а не {difficulty!r}") from None
+    if not 0 <= low <= high:
+        raise ValueError(f"неверный диапазон сложности: {low}-{high}")
+    return low, high
+
+
+def random_solvable_tiles(size: int = 4, rng: Optional[random.Random] = None) -> List[int]:
+    """Равномерно случайная решаемая позиция (без NumPy, для одиночных позиций)"""
+    rng = rng or random
+    tiles = list(range(size * size))
+    rng.shuffle(tiles)
+    if not is_solvable(tiles, size):
+        # Та же биекция, что в iter_random_boards
+        first = size if tiles.index(0) < size else 0
+        tiles[first], tiles[first + 1] = tiles[first + 1], tiles[first]
+    return tiles
+
+
+def random_walk_tiles(moves: int, size: int = 4, rng: Optional[random.Random] = None) -> List[int]:
+    """Позиция после случайного блуждания без возвратов из цели"""
+    rng = rng or random
+    neighbours = get_neighbours(size)
+    tiles = goal_tiles(size)
+    blank = prev = len(tiles) - 1
+    for _ in range(moves):
+        cell = rng.choice([cell for cell in neighbours[blank] if cell != prev])
+        tiles[blank], tiles[cell] = tiles[cell], 0
+        prev, blank = blank, cell
+    return tiles
+
+
+class BoardPool:
+    """
+    Пул позиций 4x4 с известной длиной оптимального решения
+
+    Позиции хранятся на диске по файлу на длину решения (puzzle15_pool/NN.txt),
+    поэтому запрос позиции нужной сложности обслуживается мгновенно.
+    Когда в диапазоне остается мало позиций, фоновый поток решает
+    новые и пополняет пул.
+    """
+
+    def __init__(self, directory: str = POOL_DIR, low_water: int = 5, high_water: int = 20,
+                 max_nodes: int = 5000000):
+        self.directory = directory
+        self.low_water = low_water
+        self.high_water = high_water
+        self.max_nodes = max_nodes  # позиции, требующие больше узлов, пропускаются
+        self.boards: Dict[int, List[List[int]]] = {}
+        self._lock = threading.Lock()
+        self._refills: Dict[Tuple[int, int], threading.Thread] = {}
+        os.makedirs(directory, exist_ok=True)
+        for name in os.listdir(directory):
+            if name.endswith('.txt'):
+                with open(os.path.join(directory, name), encoding='utf-8') as source:
+                    self.boards[int(name[:-4])] = [[int(tile) for tile in line.split()]
+                                                   for line in source if line.strip()]
+
+    def _path(self, distance: int) -> str:
+        return os.path.join(self.directory, f'{distance:02d}.txt')
+
+    def count(self, low: int, high: int) -> int:
+        """Количество позиций с длиной решения в диапазоне [low, high]"""
+        with self._lock:
+            return sum(len(self.boards.get(distance, ())) for distance in range(low, high + 1))
+
+    def add(self, tiles: List[int], distance: int):
+        """Добавление решенной позиции"""
+        with self._lock:
+            self.boards.setdefault(distance, []).append(list(tiles))
+            with open(self._path(distance), 'a', encoding='utf-8') as output:
+                output.write(' '.join(map(str, tiles)) + '\n')
+
+    def take(self, low: int, high: int) -> Tuple[List[int], int]:
+        """
+        Выдача случайной позиции из диапазона с удалением из пула
+
+        Если диапазон пуст, позиция решается сразу (блокирующе).
+
+        Returns:
+            tuple: (плоское поле, длина оптимального решения)
+        """
+        with self._lock:
+            available = [(distance, index) for distance in range(low, high + 1)
+                         for index in range(len(self.boards.get(distance, ())))]
+            taken = None
+            if available:
+                distance, index = random.choice(available)
+                bucket = self.boards[distance]
+                taken = (bucket.pop(index), distance)
+                with open(self._path(distance), 'w', encoding='utf-8') as output:
+                    output.writelines(' '.join(map(str, tiles)) + '\n' for tiles in bucket)
+        if len(available) - 1 < self.low_water:
+            self.refill(low, high)
+        while taken is None:
+            taken = self._generate(low, high)
+        return taken
+
+    def _generate(self, low: int, high: int) -> Optional[Tuple[List[int], int]]:
+        """Одна попытка получить позицию из диапазона; любая решенная позиция идет в пул"""
+        if high <= 40:
+            tiles = random_walk_tiles(random.randint(low, 2 * high))
+        else:
+            tiles = random_solvable_tiles()
+        result = solve_tiles(tiles, 4, max_nodes=self.max_nodes)
+        if result is None:
+            return None
+        distance = len(result.moves)
+        if low <= distance <= high:
+            return tiles, distance
+        self.add(tiles, distance)
+        return None
+
+    def refill(self, low: int, high: int, wait: bool = False):
+        """Пополнение диапазона до high_water позиций в фоновом потоке"""
+        def run():
+            while self.count(low, high) < self.high_water:
+                found = self._generate(low, high)
+                if found is not None:
+                    self.add(*found)
+
+        with self._lock:
+            thread = self._refills.get((low, high))
+            if thread is None or not thread.is_alive():
+                thread = threading.Thread(target=run, daemon=True)
+                self._refills[(low, high)] = thread
+                thread.start()
+        if wait:
+            thread.join()
+
+
+_board_pool: Optional[BoardPool] = None
+
+
+def get_board_pool() -> BoardPool:
+    """Общий пул позиций процесса"""
+    global _board_pool
+    if _board_pool is None:
+        _board_pool = BoardPool()
+    return _board_pool
+
+
+def pool_command(args: List[str]):
+    """Заполнение пула: python 1.py pool [сложность|мин-макс] [количество]"""
+    pool = get_board_pool()
+    if args:
+        band = DIFFICULTY_BANDS.get(args[0]) or tuple(int(part) for part in args[0].split('-'))
+        if len(args) > 1:
+            pool.high_water = int(args[1])
+        start = time.perf_counter()
+        pool.refill(*band, wait=True)
+        print(f"Диапазон {band[0]}-{band[1]} пополнен за {time.perf_counter() - start:.1f} с")
+    print("Позиций в пуле по длине решения:")
+    for distance in sorted(pool.boards):
+        if pool.boards[distance]:
+            print(f"  {distance:3d}: {len(pool.boards[distance])}")
+
+
+def iter_random_boards(count: int, seed: Optional[int] = None, size: int = 4,
+                       chunk_size: int = 1 << 16) -> Iterator['np.ndarray']:
+    """
+    Потоковая генерация равномерно случайных решаемых позиций
+
+    Перестановки берутся напрямую, а у нерешаемых меняются местами две
+    плитки вне строки пустой клетки: это взаимно однозначно переводит
+    нерешаемые позиции в решаемые, поэтому распределение остается равномерным.
+
+    Args:
+        count: количество позиций
+        seed: зерно генератора (одинаковое зерно и chunk_size - одинаковый корпус)
+        size: размер стороны поля
+        chunk_size: количество позиций в одном блоке
+
+    Yields:
+        np.ndarray: блоки формы (k, size * size) типа uint8, 0 - пустая клетка
+    """
+    import numpy as np
+
+    rng = np.random.default_rng(seed)
+    cells = size * size
+    goal_row, goal_col = divmod(cells - 1, size)
+    while count > 0:
+        k = min(chunk_size, count)
+        count -= k
+        boards = rng.permuted(np.tile(np.arange(cells, dtype=np.uint8), (k, 1)), axis=1)
+        # Метки как у цели: пустая клетка считается последней плиткой
+        labels = boards.astype(np.int16)
+        labels[labels == 0] = cells
+        parity = np.zeros(k, dtype=np.int16)
+        for i in range(cells - 1):
+            parity ^= (np.count_nonzero(labels[:, i:i + 1] > labels[:, i + 1:], axis=1) & 1).astype(np.int16)
+        blank = np.argmax(boards == 0, axis=1)
+        blank_row, blank_col = np.divmod(blank, size)
+        distance = np.abs(blank_row - goal_row) + np.abs(blank_col - goal_col)
+        # Позиция решаема, если четность перестановки совпадает
+        # с четностью расстояния пустой клетки до ее цели
+        unsolvable = np.nonzero(parity != (distance & 1))[0]
+        # Меняем местами две плитки первой строки, не содержащей пустую клетку
+        row = np.where(blank_row[unsolvable] == 0, 1, 0)
+        first = row * size
+        second = first + 1
+        boards[unsolvable, first], boards[unsolvable, second] = \
+            boards[unsolvable, second], boards[unsolvable, first]
+        yield boards
+
+
+def random_boards(count: int, seed: Optional[int] = None, size: int = 4) -> 'np.ndarray':
+    """Массив (count, size * size) равномерно случайных решаемых позиций"""
+    import numpy as np
+
+    boards = np.empty((count, size * size), dtype=np.uint8)
+    offset = 0
+    for chunk in iter_random_boards(count, seed, size):
+        boards[offset:offset + len(chunk)] = chunk
+        offset += len(chunk)
+    return boards
+
+
+def generate_command(args: List[str]):
+    """Генерация корпуса позиций: python 1.py generate N [seed] [файл.npy]"""
+    import numpy as np
+
+    count = int(args[0]) if args else 1000000
+    seed = int(args[1]) if len(args) > 1 else None
+    path = args[2] if len(args) > 2 else 'puzzle15_boards.npy'
+    # Файл отображается в память, поэтому расход памяти не зависит от count
+    output = np.lib.format.open_memmap(path, mode='w+', dtype=np.uint8, shape=(count, 16))
+    start = time.perf_counter()
+    offset = 0
+    for chunk in iter_random_boards(count, seed):
+        output[offset:offset + len(chunk)] = chunk
+        offset += len(chunk)
+    output.flush()
+    elapsed = time.perf_counter() - start
+    print(f"Сгенерировано {count:,} позиций за {elapsed:.2f} с "
+          f"({count / elapsed:,.0f} позиций/с), файл: {path}")
+
+
+def read_boards(path: str) -> List[List[int]]:
+    """
+    Чтение позиций из файла
+
+    Поддерживаются .npy (результат generate) и текст: одна позиция
+    на строку, числа через пробел или запятую, 0 - пустая клетка.
+    Строка, которую не удалось разобрать, возвращается как есть, чтобы
+    пакетное решение записало ошибку именно для нее.
+    """
+    if path.endswith('.npy'):
+        import numpy as np
+        return np.load(path, mmap_mode='r').tolist()
+    boards = []
+    with open(path, encoding='utf-8') as source:
+        for line in source:
+            line = line.replace(',', ' ').strip()
+            if line and not line.startswith('#'):
+                try:
+                    boards.append([int(number) for number in line.split()])
+                except ValueError:
+                    boards.append(line)
+    return boards
+
+
+# Эвристика процесса-исполнителя: загружается один раз при старте процесса.
+# База шаблонов открывается через mmap, поэтому страницы общие для всех процессов.
+_worker_heuristic = None
+
+
+def _init_worker():
+    global _worker_heuristic
+    _worker_heuristic = default_heuristic(4)
+
+
+def _board_error(tiles) -> Optional[str]:
+    """Причина, по которой позиция из файла не может быть решена, или None"""
+    if isinstance(tiles, str):
+        return f"не удалось разобрать позицию: {tiles}"
+    size = int(round(len(tiles) ** 0.5))
+    if size < 2 or len(tiles) != size * size:
+        return f"число клеток {len(tiles)} не является квадратом размера поля"
+    if sorted(tiles) != list(range(size * size)):
+        return f"клетки должны быть числами от 0 до {size * size - 1} без повторов"
+    return None
+
+
+def _solve_job(job: Tuple[int, List[int], bool]) -> dict:
+    """Решение одной позиции в процессе-исполнителе"""
+    index, tiles, fast = job
+    error = _board_error(tiles)
+    if error is not None:
+        return {'index': index, 'board': tiles, 'error': error}
+    size = int(round(len(tiles) ** 0.5))
+    try:
+        if fast:
+            result = solve_tiles_fast(tiles, size)
+        else:
+            heuristic = _worker_heuristic if size == 4 else None
+            result = solve_tiles(tiles, size, heuristic)
+    except Exception as error:
+        # Ошибка одной позиции не должна останавливать весь пакет
+        return {'index': index, 'board': tiles, 'error': str(error) or type(error).__name__}
+    return {'index': index, 'board': tiles, 'length': len(result.moves), 'optimal': not fast,
+            'nodes': result.nodes, 'time': round(result.elapsed, 4)}
+
+
+def solve_batch(boards: Sequence[List[int]], output_path: Optional[str] = None,
+                workers: Optional[int] = None, fast: bool = False) -> float:
+    """
+    Параллельное решение набора позиций в пуле процессов
+
+    Результаты пишутся в output_path (.jsonl или .csv) по мере готовности.
+
+    Returns:
+        float: общее время работы в секундах
+    """
+    workers = workers or os.cpu_count() or 1
+    output = open(output_path, 'w', encoding='utf-8', newline='') if output_path else None
+    writer = None
+    if output is not None and output_path.endswith('.csv'):
+        writer = csv.DictWriter(output, fieldnames=['index', 'length', 'optimal', 'nodes', 'time', 'board', 'error'])
+        writer.writeheader()
+    jobs = ((index, tiles if isinstance(tiles, str) else list(tiles), fast)
+            for index, tiles in enumerate(boards))
+    start = time.perf_counter()
+    try:
+        with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker) as executor:
+            # Держим ограниченное число задач в очереди, чтобы память не росла с размером набора
+            pending = set()
+            for job in itertools.islice(jobs, workers * 4):
+                pending.add(executor.submit(_solve_job, job))
+            while pending:
+                done, pending = wait(pending, return_when=FIRST_COMPLETED)
+                for future in done:
+                    result = future.result()
+                    if writer is not None:
+                        board = result['board']
+                        if not isinstance(board, str):
+                            board = ' '.join(map(str, board))
+                        writer.writerow(dict(result, board=board))
+                    elif output is not None:
+                        output.write(json.dumps(result) + '\n')
+                for job in itertools.islice(jobs, len(done)):
+                    pending.add(executor.submit(_solve_job, job))
+                if output is not None:
+                    output.flush()
+    finally:
+        if output is not None:
+            output.close()
+    return time.perf_counter() - start
+
+
+def batch_command(args: List[str]):
+    """Пакетное решение: python 1.py batch позиции.npy результаты.jsonl [параметры]"""
+    parser = argparse.ArgumentParser(prog='1.py batch', description='Пакетное решение позиций')
+    parser.add_argument('boards', help='файл позиций (.npy или текст)')
+    parser.add_argument('output', help='файл результатов (.jsonl или .csv)')
+    parser.add_argument('--workers', type=int, default=os.cpu_count(), help='число процессов')
+    parser.add_argument('--limit', type=int, help='решить только первые N позиций')
+    parser.add_argument('--fast', action='store_true', help='быстрое неоптимальное решение')
+    parser.add_argument('--scaling', help='список чисел процессов для замера масштабируемости, например 1,2,4')
+    options = parser.parse_args(args)
+
+    boards = read_boards(options.boards)[:options.limit]
+    elapsed = solve_batch(boards, options.output, options.workers, options.fast)
+    print(f"Решено позиций: {len(boards)} за {elapsed:.2f} с, "
+          f"{len(boards) / elapsed:.2f} позиций/с, процессов: {options.workers}")
+
+    if options.scaling:
+        counts = [int(count) for count in options.scaling.split(',')]
+        timings = {count: solve_batch(boards, None, count, options.fast) for count in counts}
+        base = min(counts)
+        print(f"\n{'Процессов':>10} {'Позиций/с':>12} {'Ускорение':>10} {'Эффективность':>14}")
+        for count in counts:
+            speedup = timings[base] / timings[count]
+            print(f"{count:>10} {len(boards) / timings[count]:12.2f} {speedup:10.2f} "
+                  f"{speedup * base / count:14.0%}")
+
+
+def benchmark_command(args: List[str]):
+    """Сравнение скорости ходов: список списков и упакованное поле"""
+    moves = int(args[0]) if args else 200000
+    rng = random.Random(0)
+
+    game = Puzzle15()
+    start = time.perf_counter()
+    for _ in range(moves):
+        game.move_tile(*rng.choice(game.get_possible_moves()))
+        game.is_solved()
+    list_rate = moves / (time.perf_counter() - start)
+
+    packed = game.to_packed()
+    start = time.perf_counter()
+    for _ in range(moves):
+        packed = packed.move(rng.choice(packed.neighbours()))
+        packed.is_solved()
+    packed_rate = moves / (time.perf_counter() - start)
+
+    print(f"Ходов в тесте: {moves:,} (ход + проверка решения)")
+    print(f"  Puzzle15 (байты):  {list_rate:12,.0f} ходов/с")
+    print(f"  Упакованное поле:  {packed_rate:12,.0f} ходов/с "
+          f"(x{packed_rate / list_rate:.1f})")
+
+
+def main(size: int = 4):
+    """Основная функция игры"""
+    game = Puzzle15(size)
+    hints = HintEngine()
     moves_count = 0
     
-    print("Добро пожаловать в головоломку '15'!")
-    print("Цель: упорядочить числа от 1 до 15 по возрастанию.")
+    print(f"Добро пожаловать в головоломку '{size * size - 1}'!")
+    print(f"Цель: упорядочить числа от 1 до {size * size - 1} по возрастанию.")
     print("Пустая клетка должна быть в правом нижнем углу.")
     print("Для выхода введите 'q' вместо координат.")
+    print("Для подсказки введите 'h' вместо координат.")
     
     while True:
         game.display_board()
@@ -147,6 +1691,18 @@ def main():
         coords = game.get_input_coordinates()
         if coords is None:
             continue
+        if coords == 'quit':
+            print(f"\nИгра завершена. Сделано ходов: {moves_count}")
+            break
+        if coords == 'hint':
+            move = hints.hint(game)
+            if move is None:
+                print("Подсказка недоступна: головоломка уже решена")
+                continue
+            row, col = move
+            print(f"Подсказка: переместите плитку {game.tiles[row * game.size + col]} ({row}, {col})")
+            print(f"Статистика подсказок: {hints.stats()}")
+            continue
         
         row, col = coords
         
@@ -160,4 +1716,25 @@ def main():
         print("\n" + "-"*40)
 
 if __name__ == "__main__":
-    main()
\ No newline at end of file
+    if len(sys.argv) > 1 and sys.argv[1] == "solve":
+        solve_command(sys.argv[2:])
+    elif len(sys.argv) > 1 and sys.argv[1] == "bench":
+        benchmark_command(sys.argv[2:])
+    elif len(sys.argv) > 1 and sys.argv[1] == "batch":
+        batch_command(sys.argv[2:])
+    elif len(sys.argv) > 1 and sys.argv[1] == "pool":
+        pool_command(sys.argv[2:])
+    elif len(sys.argv) > 1 and sys.argv[1] == "generate":
+        generate_command(sys.argv[2:])
+    elif len(sys.argv) > 1 and sys.argv[1] == "hint-bench":
+        hint_benchmark_command(sys.argv[2:])
+    elif len(sys.argv) > 1 and sys.argv[1] == "bench-sizes":
+        size_benchmark_command(sys.argv[2:])
+    elif len(sys.argv) > 1 and sys.argv[1] == "build-table8":
+        eight_table_command(sys.argv[2:])
+    elif len(sys.argv) > 1 and sys.argv[1] == "build-pdb":
+        build_pattern_database(*sys.argv[2:3])
+    elif len(sys.argv) > 1 and sys.argv[1] == "play":
+        main(int(sys.argv[2]) if len(sys.argv) > 2 else 4)
+    else:
+        main()
\ No newline at end of file
@@ -1,13 +1,630 @@
+import itertools
+import os
 import random
+import sys
+from functools import lru_cache
+
+DIFFICULTY_LENGTHS = {'easy': 3, 'medium': 4, 'hard': 5}
+DIFFICULTY_ATTEMPTS = {'easy': 12, 'medium': 10, 'hard': 8}
+MATRIX_MAX_SECRETS = 5000  # матрица 'hard' (27216 x 27216) заняла бы ~740 МБ
+MATRIX_DIR = os.path.dirname(os.path.abspath(__file__))
+POPCOUNT = [bin(mask).count('1') for mask in range(1 << 10)]
+
+
+ALPHABET = '0123456789ABCDEFGHIJKLMNOPQRSTUVWXYZ'
+DIGIT_VALUES = {**{ch: i for i, ch in enumerate(ALPHABET)}, **{ch.lower(): i for i, ch in enumerate(ALPHABET)}}
+# Маска цифр для каждого байта (пары шестнадцатеричных цифр)
+BYTE_MASKS = tuple((1 << (b >> 4)) | (1 << (b & 15)) for b in range(256))
+
+
+def digit_bits(base):
+    """Количество бит на одну позицию в упакованном числе"""
+    return max(4, (base - 1).bit_length())
+
+
+@lru_cache(maxsize=None)
+def alphabet_set(base):
+    """Допустимые символы цифр для основания (обоих регистров)"""
+    return frozenset(ch for ch, digit in DIGIT_VALUES.items() if digit < base)
+
+
+@lru_cache(maxsize=1 << 16)
+def encode_number(number, base=10):
+    """
+    Строка -> (маска цифр, позиционно упакованные цифры)
+
+    Маска содержит бит для каждой встречающейся цифры, упакованное число -
+    цифры по digit_bits(base) бит, первая цифра в старших битах. Результат
+    кэшируется: в партии и у решателей одни и те же числа кодируются многократно.
+    """
+    if base <= 16 and number.isascii() and number.isalnum() and number[1:2] not in ('x', 'X'):
+        # При 4 битах на цифру упакованное число - это просто шестнадцатеричная запись
+        try:
+            packed = int(number, 16)
+        except ValueError:
+            packed = None
+        if packed is not None:
+            mask = 0
+            rest = packed
+            for _ in range(len(number) >> 1):
+                mask |= BYTE_MASKS[rest & 0xFF]
+                rest >>= 8
+            if len(number) & 1:
+                mask |= 1 << rest
+            if not mask >> base:
+                return mask, packed
+    bits = digit_bits(base)
+    mask = 0
+    packed = 0
+    for ch in number:
+        digit = DIGIT_VALUES.get(ch, base)
+        if digit >= base:
+            raise ValueError(f"Недопустимая цифра '{ch}' для основания {base}")
+        mask |= 1 << digit
+        packed = (packed << bits) | digit
+    return mask, packed
+
+
+def decode_number(packed, length, base=10):
+    """Позиционно упакованные цифры -> строка"""
+    bits = digit_bits(base)
+    lane = (1 << bits) - 1
+    return ''.join(ALPHABET[(packed >> (bits * (length - 1 - i))) & lane] for i in range(length))
+
+
+@lru_cache(maxsize=None)
+def _lane_constants(length, base):
+    """Маски (старшие биты позиций, младшие биты позиций без старшего) для SWAR"""
+    bits = digit_bits(base)
+    low = sum(1 << (bits * i) for i in range(length))
+    high = low << (bits - 1)
+    return high, low * ((1 << (bits - 1)) - 1)
+
+
+def score_codes_pair(guess_code, secret_code, length, base=10):
+    """
+    Быки и коровы для двух закодированных чисел за O(1)
+
+    Быки + коровы = popcount(маска A & маска B), быки - число нулевых
+    позиций в XOR упакованных цифр (ненулевые позиции находятся SWAR-приемом
+    без цикла по цифрам).
+
+    Returns:
+        tuple: (быки, коровы)
+    """
+    high, fill = _lane_constants(length, base)
+    common = (guess_code[0] & secret_code[0]).bit_count()
+    diff = guess_code[1] ^ secret_code[1]
+    nonzero = (((diff & ~high) + fill) | diff) & high
+    bulls = length - nonzero.bit_count()
+    return bulls, common - bulls
+
+
+def score_strings(guess, secret):
+    """Быки и коровы по строкам (исходный строковый алгоритм, для сравнения)"""
+    bulls = 0
+    cows = 0
+    for i in range(len(guess)):
+        if guess[i] == secret[i]:
+            bulls += 1
+        elif guess[i] in secret:
+            cows += 1
+    return bulls, cows
+
+
+def generate_secrets(count, length, rng=None, base=10):
+    """
+    Массовая генерация секретных чисел
+
+    Частичная перетасовка Фишера-Йетса по столбцам: первая цифра выбирается
+    среди ненулевых, остальные - среди еще не использованных, поэтому все
+    допустимые числа равновероятны и повторная выборка не нужна.
+
+    Args:
+        count: количество чисел
+        length: длина числа (от 1 до base)
+        rng: np.random.Generator; для процессов - независимые потоки из secret_streams
+        base: размер алфавита цифр
+
+    Returns:
+        np.ndarray: цифры (count, length) uint8
+    """
+    import numpy as np
+
+    if not 1 <= length <= base:
+        raise ValueError(f"Длина числа должна быть от 1 до {base}")
+    rng = rng if rng is not None else np.random.default_rng()
+    digits = np.tile(np.arange(base, dtype=np.uint8), (count, 1))
+    rows = np.arange(count)
+    for position in range(length):
+        # На первой позиции стоит 0, поэтому он никогда не останется первым
+        other = rng.integers(max(position, 1), base, count)
+        current = digits[:, position].copy()
+        digits[:, position] = digits[rows, other]
+        digits[rows, other] = current
+    return digits[:, :length].copy()
+
+
+def secret_streams(seed, count):
+    """Независимые непересекающиеся генераторы для count процессов (SeedSequence.spawn)"""
+    import numpy as np
+
+    return [np.random.default_rng(stream) for stream in np.random.SeedSequence(seed).spawn(count)]
+
+
+def secrets_to_strings(digits):
+    """Массив цифр (N, length) -> список строк"""
+    import numpy as np
+
+    symbols = np.frombuffer(ALPHABET.encode(), dtype=np.uint8)[digits]
+    return symbols.view(f'S{digits.shape[1]}').ravel().astype(str).tolist()
+
+
+@lru_cache(maxsize=None)
+def all_secrets(length):
+    """
+    Все допустимые числа заданной длины
+
+    Returns:
+        tuple: строки без повторяющихся цифр и без ведущего нуля
+    """
+    return tuple(''.join(digits) for digits in itertools.permutations('0123456789', length)
+                 if digits[0] != '0')
+
+
+@lru_cache(maxsize=None)
+def secrets_arrays(length):
+    """
+    Числа в виде массивов NumPy
+
+    Returns:
+        tuple: (цифры (N, length) uint8, маски присутствующих цифр (N,) uint16)
+    """
+    import numpy as np
+
+    digits = np.array([[int(ch) for ch in secret] for secret in all_secrets(length)], dtype=np.uint8)
+    return digits, digit_masks(digits)
+
+
+def score_codes(guess_digits, guess_masks, digits, masks):
+    """
+    Векторная оценка блока попыток против набора чисел
+
+    Returns:
+        np.ndarray: (G, N) uint8, код ответа = быки * 16 + коровы
+    """
+    import numpy as np
+
+    bulls = (guess_digits[:, None, :] == digits[None, :, :]).sum(axis=2, dtype=np.uint8)
+    common = _popcount_array()[guess_masks[:, None] & masks[None, :]]
+    # быки * 16 + коровы, где коровы = общие цифры - быки
+    return bulls * 15 + common
+
+
+def to_digit_array(numbers):
+    """Список строк-чисел -> массив цифр (N, length) uint8 (массив возвращается как есть)"""
+    import numpy as np
+
+    if isinstance(numbers, np.ndarray):
+        return numbers
+    return np.array([[int(ch) for ch in number] for number in numbers], dtype=np.uint8).reshape(len(numbers), -1)
+
+
+def digit_masks(digits):
+    """Маски присутствующих цифр для массива цифр (N, length)"""
+    import numpy as np
+
+    return np.bitwise_or.reduce(np.left_shift(1, digits.astype(np.uint16)), axis=1).astype(np.uint16)
+
+
+@lru_cache(maxsize=None)
+def _popcount_array():
+    import numpy as np
+
+    return np.asarray(POPCOUNT, dtype=np.uint8)
+
+
+def score_guess_batch(guess, candidates, masks=None):
+    """
+    Оценка одной попытки против множества чисел за один векторный проход
+
+    Args:
+        guess: попытка (строка)
+        candidates: список строк или массив цифр (N, length)
+        masks: маски цифр кандидатов, если уже посчитаны (digit_masks)
+
+    Returns:
+        tuple: (быки, коровы) - массивы uint8 длины N
+    """
+    digits = to_digit_array(candidates)
+    if masks is None:
+        masks = digit_masks(digits)
+    guess_mask = 0
+    bulls = None
+    for position, ch in enumerate(guess):
+        digit = int(ch)
+        guess_mask |= 1 << digit
+        # Столбцы сравниваются по одному: это быстрее суммы по оси длины 3-5
+        matches = (digits[:, position] == digit).view('uint8')
+        bulls = matches if bulls is None else bulls + matches
+    common = _popcount_array()[masks & guess_mask]
+    return bulls, common - bulls
+
+
+def filter_candidates(candidates, history, masks=None):
+    """
+    Отбор чисел, согласованных со всеми попытками
+
+    Args:
+        candidates: список строк или массив цифр (N, length)
+        history: последовательность (попытка, быки, коровы)
+        masks: маски цифр кандидатов, если уже посчитаны
+
+    Returns:
+        tuple: (подходящие строки массива цифр, их маски)
+    """
+    digits = to_digit_array(candidates)
+    if masks is None:
+        masks = digit_masks(digits)
+    for guess, bulls, cows in history:
+        guess_bulls, guess_cows = score_guess_batch(guess, digits, masks)
+        keep = (guess_bulls == bulls) & (guess_cows == cows)
+        digits, masks = digits[keep], masks[keep]
+    return digits, masks
+
+
+def entropy_guess(digits, masks, rng=None, cell_budget=200000):
+    """
+    Попытка с максимальной энтропией ответа среди кандидатов
+
+    Кандидатов перебирается не больше cell_budget // N (случайная выборка),
+    чтобы время не зависело от размера набора.
+
+    Args:
+        digits: цифры кандидатов (N, length)
+        masks: маски цифр кандидатов
+        rng: генератор для выборки (random.Random)
+        cell_budget: ограничение на размер блока оценок попытки x кандидаты
+
+    Returns:
+        tuple: (индекс лучшей попытки в digits, энтропия в битах)
+    """
+    import numpy as np
+
+    total = len(digits)
+    if total == 1:
+        return 0, 0.0
+    pool = np.arange(total)
+    size = max(1, cell_budget // total)
+    if size < total:
+        pool = np.sort(np.array((rng or random).sample(range(total), size)))
+    scores = score_codes(digits[pool], masks[pool], digits, masks).astype(np.int64)
+    scores += (np.arange(len(pool)) * 256)[:, None]
+    counts = np.bincount(scores.ravel(), minlength=len(pool) * 256).reshape(len(pool), 256)
+    weighted = (counts * np.log2(np.maximum(counts, 1))).sum(axis=1)
+    best = int(np.argmin(weighted))
+    return int(pool[best]), float(np.log2(total) - weighted[best] / total)
+
+
+def load_score_matrix(length):
+    """
+    Матрица ответов для всех пар чисел, отображенная в память
+
+    При первом вызове матрица строится и сохраняется в
+    bulls_cows_scores_<length>.npy. Для длин с числом вариантов больше
+    MATRIX_MAX_SECRETS возвращается None.
+    """
+    import numpy as np
+
+    digits, masks = secrets_arrays(length)
+    if len(digits) > MATRIX_MAX_SECRETS:
+        return None
+    path = os.path.join(MATRIX_DIR, f'bulls_cows_scores_{length}.npy')
+    if not os.path.exists(path):
+        matrix = np.empty((len(digits), len(digits)), dtype=np.uint8)
+        for start in range(0, len(digits), 256):
+            matrix[start:start + 256] = score_codes(digits[start:start + 256],
+                                                    masks[start:start + 256], digits, masks)
+        # Временное имя свое у каждого процесса: матрицу могут строить одновременно
+        tmp_path = f'{path}.{os.getpid()}.tmp.npy'
+        np.save(tmp_path, matrix)
+        os.replace(tmp_path, path)
+    return np.load(path, mmap_mode='r')
+
+
+class BullsAndCowsSolver:
+    """
+    Компьютер, угадывающий число игрока
+
+    Стратегия 'minimax' (Кнут) выбирает попытку, минимизирующую худший
+    остаток кандидатов, 'expected' - ожидаемый остаток, 'random' - случайного
+    согласованного кандидата. Ответы берутся
+    из матрицы всех пар, поэтому выбор хода занимает миллисекунды.
+    """
+
+    # Кандидатов больше этого числа - перебираем попытки только среди кандидатов
+    FULL_POOL_LIMIT = 256
+    # Без матрицы ('hard') перебираем не больше стольких попыток
+    SAMPLE_POOL_LIMIT = 300
+
+    _openings = {}
+
+    def __init__(self, length=4, strategy='minimax', rng=None):
+        self.length = length
+        self.strategy = strategy
+        self.rng = rng or random.Random()
+        self.secrets = all_secrets(length)
+        self.index = {secret: i for i, secret in enumerate(self.secrets)}
+        self.matrix = load_score_matrix(length)
+        self.reset()
+
+    def reset(self):
+        """Начало новой партии (матрица и индексы сохраняются)"""
+        import numpy as np
+
+        self.candidates = np.arange(len(self.secrets))
+        self.history = []
+
+    def _scores(self, pool, candidates):
+        """Коды ответов (len(pool), len(candidates))"""
+        import numpy as np
+
+        if self.matrix is not None:
+            return self.matrix[np.ix_(pool, candidates)]
+        digits, masks = secrets_arrays(self.length)
+        return score_codes(digits[pool], masks[pool], digits[candidates], masks[candidates])
+
+    def _choose(self, pool):
+        """Лучшая попытка из pool по выбранной стратегии"""
+        import numpy as np
+
+        scores = self._scores(pool, self.candidates).astype(np.int64)
+        scores += (np.arange(len(pool)) * 256)[:, None]
+        counts = np.bincount(scores.ravel(), minlength=len(pool) * 256).reshape(len(pool), 256)
+        if self.strategy == 'expected':
+            cost = (counts.astype(np.int64) ** 2).sum(axis=1)
+        else:
+            cost = counts.max(axis=1)
+        # При равенстве предпочитаем попытку, которая сама может оказаться ответом
+        is_candidate = np.isin(pool, self.candidates)
+        return int(pool[np.argmin(cost * 2 + ~is_candidate)])
+
+    @property
+    def remaining(self):
+        """Количество оставшихся кандидатов"""
+        return len(self.candidates)
+
+    def next_guess(self):
+        """Следующая попытка компьютера"""
+        import numpy as np
+
+        if len(self.candidates) == 0:
+            return None
+        if not self.history and self.strategy != 'random':
+            key = (self.length, self.strategy)
+            if key not in self._openings:
+                pool = np.arange(len(self.secrets))
+                if self.matrix is None:
+                    pool = np.sort(np.random.default_rng(0).choice(
+                        pool, self.SAMPLE_POOL_LIMIT, replace=False))
+                self._openings[key] = self._choose(pool)
+            return self.secrets[self._openings[key]]
+        return self.secrets[self.best_index()]
+
+    def best_index(self):
+        """Индекс лучшей попытки для текущих кандидатов (без кэша первого хода)"""
+        import numpy as np
+
+        if len(self.candidates) == 1:
+            return int(self.candidates[0])
+        if self.strategy == 'random':
+            return int(self.candidates[self.rng.randrange(len(self.candidates))])
+        if self.matrix is not None and len(self.candidates) <= self.FULL_POOL_LIMIT:
+            pool = np.arange(len(self.secrets))
+        else:
+            pool = self.candidates
+            if len(pool) > self.SAMPLE_POOL_LIMIT:
+                pool = np.sort(np.array(self.rng.sample(list(pool), self.SAMPLE_POOL_LIMIT)))
+        return self._choose(pool)
+
+    def update(self, guess, bulls, cows):
+        """
+        Учет ответа игрока: остаются только согласованные кандидаты
+
+        Returns:
+            int: количество оставшихся кандидатов
+        """
+        import numpy as np
+
+        self.history.append((guess, bulls, cows))
+        codes = self._scores(np.array([self.index[guess]]), self.candidates)[0]
+        self.candidates = self.candidates[codes == bulls * 16 + cows]
+        return len(self.candidates)
+
+
+TREE_DIR = MATRIX_DIR
+# 'expected' минимизирует среднее число попыток, 'minimax' - худший случай
+TREE_STRATEGY = 'expected'
+
+
+def tree_path(difficulty, strategy=TREE_STRATEGY):
+    return os.path.join(TREE_DIR, f'bulls_cows_tree_{difficulty}_{strategy}.npz')
+
+
+def _build_subtree(job):
+    """
+    Построение поддерева стратегии в процессе-исполнителе
+
+    Args:
+        job: (длина, стратегия, индексы кандидатов, глубина корня, зерно ГСЧ)
+
+    Returns:
+        dict: попытки и размеры узлов, ребра (родитель, код, потомок) в
+        локальной нумерации (корень - 0), глубины угаданных чисел
+    """
+    import numpy as np
+
+    length, strategy, candidates, depth, seed = job
+    solver = BullsAndCowsSolver(length, strategy, random.Random(seed))
+    solved = length * 16
+    guesses, sizes, edges, depths = [], [], [], []
+    stack = [(np.asarray(candidates), -1, 0, depth)]
+    while stack:
+        candidates, parent, code, depth = stack.pop()
+        node = len(guesses)
+        if parent >= 0:
+            edges.append((parent, code, node))
+        solver.candidates = candidates
+        guess = solver.best_index()
+        guesses.append(guess)
+        sizes.append(len(candidates))
+        codes = solver._scores(np.array([guess]), candidates)[0]
+        for answer in np.unique(codes).tolist():
+            if answer == solved:
+                depths.append(depth)
+            else:
+                stack.append((candidates[codes == answer], node, answer, depth + 1))
+    return {'guesses': guesses, 'sizes': sizes, 'edges': edges, 'depths': depths}
+
+
+def build_decision_tree(difficulty, strategy=TREE_STRATEGY, workers=None):
+    """
+    Построение полного дерева стратегии для уровня сложности
+
+    Первый ход считается в основном процессе, поддеревья для каждого ответа
+    на него строятся параллельно. Результат сохраняется в
+    bulls_cows_tree_<уровень>_<стратегия>.npz.
+
+    Returns:
+        dict: статистика (узлов, средняя и максимальная глубина, время)
+    """
+    import time
+    import numpy as np
+    from concurrent.futures import ProcessPoolExecutor
+
+    start = time.perf_counter()
+    length = DIFFICULTY_LENGTHS[difficulty]
+    solver = BullsAndCowsSolver(length, strategy, random.Random(0))
+    root = solver.index[solver.next_guess()]
+    codes = solver._scores(np.array([root]), solver.candidates)[0]
+    answers = [answer for answer in np.unique(codes).tolist() if answer != length * 16]
+    # Большие ветви отправляем первыми, чтобы процессы заканчивали одновременно
+    answers.sort(key=lambda answer: -int((codes == answer).sum()))
+    jobs = [(length, strategy, solver.candidates[codes == answer], 2, answer) for answer in answers]
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        subtrees = list(executor.map(_build_subtree, jobs))
+
+    guesses, sizes, keys, children = [root], [len(solver.candidates)], [], []
+    depths = [1]
+    for answer, subtree in zip(answers, subtrees):
+        offset = len(guesses)
+        keys.append(answer)
+        children.append(offset)
+        guesses.extend(subtree['guesses'])
+        sizes.extend(subtree['sizes'])
+        for parent, code, child in subtree['edges']:
+            keys.append((parent + offset) * 128 + code)
+            children.append(child + offset)
+        depths.extend(subtree['depths'])
+
+    order = np.argsort(keys)
+    path = tree_path(difficulty, strategy)
+    with open(path + '.tmp', 'wb') as f:
+        np.savez_compressed(f, guesses=np.array(guesses, dtype=np.uint16),
+                            sizes=np.array(sizes, dtype=np.uint16),
+                            keys=np.array(keys, dtype=np.uint32)[order],
+                            children=np.array(children, dtype=np.uint32)[order])
+    os.replace(path + '.tmp', path)
+    load_decision_tree.cache_clear()
+    return {'nodes': len(guesses), 'secrets': len(depths), 'average': sum(depths) / len(depths),
+            'max': max(depths), 'histogram': np.bincount(depths).tolist(),
+            'bytes': os.path.getsize(path), 'elapsed': time.perf_counter() - start}
+
+
+class DecisionTree:
+    """
+    Готовое дерево стратегии: попытка в узле и переход по ответу
+
+    Узел - номер, попытка - индекс в all_secrets, переход хранится в словаре
+    (узел * 128 + код ответа) -> потомок, поэтому ход стоит одного обращения.
+    """
+
+    def __init__(self, length, data):
+        self.length = length
+        self.secrets = all_secrets(length)
+        self.guesses = data['guesses'].tolist()
+        self.sizes = data['sizes'].tolist()
+        self.children = dict(zip(data['keys'].tolist(), data['children'].tolist()))
+
+    def guess(self, node):
+        """Попытка в узле"""
+        return self.secrets[self.guesses[node]]
+
+    def child(self, node, bulls, cows):
+        """Узел после ответа или None, если такой ответ невозможен"""
+        return self.children.get(node * 128 + bulls * 16 + cows)
+
+
+@lru_cache(maxsize=None)
+def load_decision_tree(difficulty, strategy=TREE_STRATEGY):
+    """Дерево стратегии с диска или None, если оно еще не построено"""
+    import numpy as np
+
+    path = tree_path(difficulty, strategy)
+    if not os.path.exists(path):
+        return None
+    with np.load(path) as data:
+        return DecisionTree(DIFFICULTY_LENGTHS[difficulty], data)
+
+
+class TreeGuesser:
+    """Компьютер, угадывающий число по готовому дереву (интерфейс как у BullsAndCowsSolver)"""
+
+    def __init__(self, tree):
+        self.tree = tree
+        self.reset()
+
+    def reset(self):
+        self.node = 0
+        self.history = []
+
+    @property
+    def remaining(self):
+        return 0 if self.node is None else self.tree.sizes[self.node]
+
+    def next_guess(self):
+        return None if self.node is None else self.tree.guess(self.node)
+
+    def update(self, guess, bulls, cows):
+        self.history.append((guess, bulls, cows))
+        self.node = self.tree.child(self.node, bulls, cows)
+        return self.remaining
+
 
 class BullsAndCows:
-    def __init__(self):
-        """Инициализация игры"""
+    # Без __dict__: на сервере живут сотни тысяч партий
+    __slots__ = ('base', 'rng', 'secret_number', '_secret_code', 'max_attempts', 'attempts',
+                 'difficulty', 'history', '_hint_state')
+
+    def __init__(self, base=10, rng=None):
+        """
+        Инициализация игры
+        
+        Args:
+            base: Размер алфавита цифр (10 - десятичные, 16 - шестнадцатеричные)
+            rng: Генератор случайных чисел (random.Random), по умолчанию модуль random
+        """
+        self.base = base
+        self.rng = rng or random
         self.secret_number = None
+        # (число, маска, упакованные цифры, константы SWAR) - кодируется при первой проверке
+        self._secret_code = None
         self.max_attempts = 10
         self.attempts = 0
         self.difficulty = None
-        
+        self.history = []
+        self._hint_state = None
+    
     def generate_secret_number(self, difficulty='medium'):
         """
         Генерация секретного числа в зависимости от уровня сложности
@@ -17,24 +634,60 @@ class BullsAndCows:
         """
         self.difficulty = difficulty
         
-        if difficulty == 'easy':
-            # Легкий: 3-значное число без повторяющихся цифр
-            self.secret_number = self.generate_unique_number(3)
-            self.max_attempts = 12
-        elif difficulty == 'medium':
-            # Средний: 4-значное число без повторяющихся цифр
-            self.secret_number = self.generate_unique_number(4)
-            self.max_attempts = 10
-        elif difficulty == 'hard':
-            # Сложный: 5-значное число без повторяющихся цифр
-            self.secret_number = self.generate_unique_number(5)
-            self.max_attempts = 8
+        # Легкий: 3 цифры, средний: 4, сложный: 5; по умолчанию как средний
+        self.secret_number = self.generate_unique_number(DIFFICULTY_LENGTHS.get(difficulty, 4))
+        self.max_attempts = DIFFICULTY_ATTEMPTS.get(difficulty, 10)
+        self.attempts = 0
+    
+    def new_game(self, difficulty='medium', secret=None):
+        """
+        Новая партия без ввода-вывода
+        
+        Args:
+            difficulty: Уровень сложности ('easy', 'medium', 'hard')
+            secret: Загаданное число; если не задано, генерируется случайно
+        """
+        if secret is None:
+            self.generate_secret_number(difficulty)
         else:
-            # По умолчанию 4-значное число
-            self.secret_number = self.generate_unique_number(4)
-            self.max_attempts = 10
+            self.difficulty = difficulty
+            self.secret_number = secret
+            self.max_attempts = DIFFICULTY_ATTEMPTS.get(difficulty, 10)
+            self.attempts = 0
+        self.history = []
+    
+    def submit_guess(self, guess):
+        """
+        Попытка игрока в текущей партии
+        
+        Args:
+            guess: Предположение игрока
             
-        self.attempts = 0
+        Returns:
+            tuple: (быки, коровы, угадано ли число)
+            
+        Raises:
+            ValueError: если ввод некорректен или партия уже окончена
+        """
+        if self.is_over:
+            raise ValueError("Партия окончена!")
+        is_valid, error_msg = self.validate_input(guess, len(self.secret_number))
+        if not is_valid:
+            raise ValueError(error_msg)
+        self.attempts += 1
+        bulls, cows, is_correct = self.check_guess(guess)
+        self.history.append((guess, bulls, cows))
+        return bulls, cows, is_correct
+    
+    @property
+    def is_won(self):
+        """Угадано ли число в текущей партии"""
+        return bool(self.history) and self.history[-1][1] == len(self.secret_number)
+    
+    @property
+    def is_over(self):
+        """Окончена ли текущая партия (угадано или закончились попытки)"""
+        return self.is_won or self.attempts >= self.max_attempts
     
     def generate_unique_number(self, length):
         """
@@ -46,20 +699,14 @@ class BullsAndCows:
         Returns:
             str: Строковое представление числа
         """
-        digits = list(range(10))
         # Первая цифра не может быть 0
-        first_digit = random.choice(digits[1:])
-        digits.remove(first_digit)
-        
-        number_digits = [str(first_digit)]
+        first_digit = self.rng.randrange(1, self.base)
         
-        # Добавляем остальные цифры
-        for _ in range(length - 1):
-            digit = random.choice(digits)
-            digits.remove(digit)
-            number_digits.append(str(digit))
+        # Остальные цифры - случайная выборка из неиспользованных
+        digits = [digit for digit in range(self.base) if digit != first_digit]
+        number_digits = [first_digit] + self.rng.sample(digits, length - 1)
         
-        return ''.join(number_digits)
+        return ''.join(ALPHABET[digit] for digit in number_digits)
     
     def check_guess(self, guess):
         """
@@ -71,19 +718,26 @@ class BullsAndCows:
         Returns:
             tuple: (быки, коровы, совпадение)
         """
-        if len(guess) != len(self.secret_number):
+        secret = self.secret_number
+        length = len(secret)
+        if len(guess) != length:
             return 0, 0, False
+        code = self._secret_code
+        if code is None or code[0] is not secret:
+            code = self._secret_code = (secret, *encode_number(secret, self.base),
+                                        *_lane_constants(length, self.base))
+        _, secret_mask, secret_packed, high, fill = code
         
-        bulls = 0  # Правильная цифра на правильном месте
-        cows = 0   # Правильная цифра на неправильном месте
+        # Быки - правильная цифра на правильном месте,
+        # коровы - правильная цифра на неправильном месте.
+        # Тот же прием, что в score_codes_pair, но без вызова функции:
+        # на длинах 3-5 вызов стоит дороже самой оценки
+        guess_mask, diff = encode_number(guess, self.base)
+        diff ^= secret_packed
+        bulls = length - ((((diff & ~high) + fill) | diff) & high).bit_count()
+        cows = (guess_mask & secret_mask).bit_count() - bulls
         
-        for i in range(len(guess)):
-            if guess[i] == self.secret_number[i]:
-                bulls += 1
-            elif guess[i] in self.secret_number:
-                cows += 1
-        
-        is_correct = (bulls == len(self.secret_number))
+        is_correct = (bulls == length)
         return bulls, cows, is_correct
     
     def validate_input(self, guess, length):
@@ -97,13 +751,18 @@ class BullsAndCows:
         Returns:
             tuple: (валидность, сообщение об ошибке)
         """
-        if not guess.isdigit():
+        # Строковые проверки дешевле кодирования в маску
+        if self.base == 10:
+            is_digits = guess.isascii() and guess.isdigit()
+        else:
+            is_digits = bool(guess) and alphabet_set(self.base).issuperset(guess)
+        if not is_digits:
             return False, "Введите только цифры!"
         
         if len(guess) != length:
             return False, f"Число должно содержать {length} цифр!"
         
-        if len(set(guess)) != len(guess):
+        if len(set(guess.upper() if self.base > 10 else guess)) != len(guess):
             return False, "Цифры не должны повторяться!"
         
         if guess[0] == '0':
@@ -129,13 +788,36 @@ class BullsAndCows:
         else:
             return 'medium'
     
-    def get_hint(self, attempt_number):
+    def get_hint(self, attempt_number, previous_guesses=None):
         """
         Предоставление подсказки игроку
         
+        Подсказка дается каждые 3 попытки или по запросу (attempt_number = 0).
+        Если переданы предыдущие попытки, показывается число подходящих
+        вариантов и попытка с максимальной энтропией ответа. Кандидаты
+        сохраняются между вызовами и отсекаются только новыми попытками.
+        
         Args:
-            attempt_number: Номер текущей попытки
+            attempt_number: Номер текущей попытки (0 - подсказка по запросу)
+            previous_guesses: Список (попытка, быки, коровы) текущей партии
         """
+        if attempt_number % 3 != 0:
+            return
+        
+        if previous_guesses is not None and self.base == 10:
+            digits, masks = self._hint_candidates(previous_guesses)
+            if len(digits) == 0:
+                print("\nПодсказка: ни одно число не подходит под ответы!")
+            elif len(digits) == 1:
+                print(f"\nПодсказка: осталось единственное число - {''.join(map(str, digits[0]))}")
+            else:
+                index, entropy = entropy_guess(digits, masks)
+                guess = ''.join(map(str, digits[index]))
+                print(f"\nПодсказка: подходящих чисел осталось {len(digits)}. "
+                      f"Попробуйте {guess} (ожидается {entropy:.2f} бит информации)")
+            if attempt_number == 0:
+                return
+        
         hints = [
             "Попробуйте начинать с середины диапазона возможных чисел.",
             "Обращайте внимание на цифры, которые уже встречались в ваших попытках.",
@@ -144,8 +826,19 @@ class BullsAndCows:
             "Используйте информацию о 'коровах' для определения позиций цифр.",
         ]
         
-        if attempt_number % 3 == 0:
-            print(f"\nПодсказка: {hints[(attempt_number // 3) % len(hints)]}")
+        print(f"\nПодсказка: {hints[(attempt_number // 3) % len(hints)]}")
+    
+    def _hint_candidates(self, previous_guesses):
+        """Числа, согласованные с попытками (отсекаются только новые попытки)"""
+        length = len(self.secret_number)
+        state = self._hint_state
+        if state is None or state[0] is not previous_guesses or state[1] > len(previous_guesses):
+            digits, masks = secrets_arrays(length)
+            state = (previous_guesses, 0, digits, masks)
+        _, applied, digits, masks = state
+        digits, masks = filter_candidates(digits, previous_guesses[applied:], masks)
+        self._hint_state = (previous_guesses, len(previous_guesses), digits, masks)
+        return digits, masks
     
     def display_rules(self):
         """Отображение правил игры"""
@@ -169,6 +862,70 @@ class BullsAndCows:
         """)
         print("="*50)
     
+    def get_game_mode(self):
+        """Выбор режима игры"""
+        print("\n" + "="*40)
+        print("Выберите режим игры:")
+        print("1. Вы угадываете число компьютера - по умолчанию")
+        print("2. Компьютер угадывает ваше число")
+        print("="*40)
+        
+        choice = input("Ваш выбор (1-2): ").strip()
+        return 'computer' if choice == '2' else 'player'
+    
+    def read_score(self, length):
+        """
+        Ввод ответа игрока на попытку компьютера
+        
+        Returns:
+            tuple: (быки, коровы) или None при ошибке ввода
+        """
+        parts = input("Быки и коровы через пробел (например: 1 2): ").split()
+        if len(parts) != 2 or not all(part.isdigit() for part in parts):
+            print("Ошибка: введите два числа!")
+            return None
+        bulls, cows = int(parts[0]), int(parts[1])
+        if bulls + cows > length or (bulls == length - 1 and cows == 1):
+            print("Ошибка: такой ответ невозможен!")
+            return None
+        return bulls, cows
+    
+    def play_computer_guesser(self):
+        """Игровой цикл, в котором компьютер угадывает число игрока"""
+        print("\nЗагадайте число из неповторяющихся цифр, не начинающееся с нуля.")
+        
+        while True:
+            difficulty = self.get_difficulty_level()
+            length = DIFFICULTY_LENGTHS[difficulty]
+            print(f"\nЗагадайте {length}-значное число. Компьютер будет угадывать!")
+            
+            tree = load_decision_tree(difficulty)
+            solver = TreeGuesser(tree) if tree else BullsAndCowsSolver(length)
+            while True:
+                guess = solver.next_guess()
+                if guess is None:
+                    print("\nНи одно число не подходит под ваши ответы - где-то ошибка!")
+                    break
+                print(f"\nПопытка {len(solver.history) + 1}: {guess} "
+                      f"(вариантов осталось: {solver.remaining})")
+                
+                score = self.read_score(length)
+                while score is None:
+                    score = self.read_score(length)
+                bulls, cows = score
+                
+                if bulls == length:
+                    print("\n" + "*" * 50)
+                    print(f"Компьютер угадал число {guess} за {len(solver.history) + 1} попыток!")
+                    print("*" * 50)
+                    break
+                solver.update(guess, bulls, cows)
+            
+            play_again = input("\nХотите сыграть еще раз? (да/нет): ").strip().lower()
+            if play_again not in ['да', 'д', 'yes', 'y']:
+                print("\nСпасибо за игру! До новых встреч!")
+                break
+    
     def play_game(self):
         """Основной игровой цикл"""
         print("\nДобро пожаловать в игру 'БЫКИ И КОРОВЫ'!")
@@ -178,15 +935,15 @@ class BullsAndCows:
             
             # Выбор уровня сложности
             difficulty = self.get_difficulty_level()
-            self.generate_secret_number(difficulty)
+            self.new_game(difficulty)
             
             length = len(self.secret_number)
             print(f"\nЗагадано {length}-значное число. У вас {self.max_attempts} попыток!")
             print("Подсказка: Все цифры в числе различны, и число не начинается с нуля.")
             
-            previous_guesses = []
+            previous_guesses = self.history
             
-            while self.attempts < self.max_attempts:
+            while not self.is_over:
                 attempts_left = self.max_attempts - self.attempts
                 print(f"\n--- Попытка: {self.attempts + 1} из {self.max_attempts} (осталось: {attempts_left}) ---")
                 
@@ -197,26 +954,25 @@ class BullsAndCows:
                         print(f"  {i:2d}. {guess} -> Быков: {bulls}, Коров: {cows}")
                 
                 # Получаем предположение от игрока
-                guess = input(f"\nВведите {length}-значное число (или 'сдаюсь' для выхода): ").strip()
+                guess = input(f"\nВведите {length}-значное число ('подсказка' - совет, "
+                              f"'сдаюсь' - выход): ").strip()
+                
+                if guess.lower() in ['подсказка', 'hint', 'h']:
+                    self.get_hint(0, previous_guesses)
+                    continue
                 
                 # Проверяем, не хочет ли игрок сдаться
                 if guess.lower() in ['сдаюсь', 'сдаться', 'выход', 'exit', 'quit', 'q']:
                     print(f"\nВы сдались. Загаданное число было: {self.secret_number}")
                     break
                 
-                # Проверяем ввод
-                is_valid, error_msg = self.validate_input(guess, length)
-                if not is_valid:
-                    print(f"Ошибка: {error_msg}")
+                # Проверяем ввод и предположение (попытка сохраняется в истории)
+                try:
+                    bulls, cows, is_correct = self.submit_guess(guess)
+                except ValueError as error:
+                    print(f"Ошибка: {error}")
                     continue
                 
-                # Проверяем предположение
-                self.attempts += 1
-                bulls, cows, is_correct = self.check_guess(guess)
-                
-                # Сохраняем попытку
-                previous_guesses.append((guess, bulls, cows))
-                
                 # Проверяем, угадал ли игрок
                 if is_correct:
                     print("\n" + "*" * 50)
@@ -234,10 +990,10 @@ class BullsAndCows:
                         print("Ни одной правильной цифры! Попробуйте другие цифры.")
                     
                     # Предоставляем подсказку каждые 3 попытки
-                    self.get_hint(self.attempts)
+                    self.get_hint(self.attempts, previous_guesses)
             
             # Если попытки закончились
-            if not is_correct and self.attempts >= self.max_attempts:
+            if not self.is_won and self.attempts >= self.max_attempts:
                 print("\n" + "-" * 40)
                 print("К сожалению, попытки закончились!")
                 print(f"Загаданное число было: {self.secret_number}")
@@ -253,10 +1009,237 @@ class BullsAndCows:
             self.attempts = 0
             print("\n" + "="*50 + "\n")
 
+def benchmark_command():
+    """Сравнение check_guess в цикле и векторной оценки: python 2.py bench"""
+    import time
+
+    game = BullsAndCows()
+    candidates = list(all_secrets(4))
+    digits, masks = secrets_arrays(4)
+    guess = '1234'
+    # Оценка симметрична: секрет задается один раз, а перебираются попытки -
+    # та же работа, что у score_guess_batch над тем же набором
+    game.secret_number = guess
+    
+    repeats = 100
+    start = time.perf_counter()
+    for _ in range(repeats // 10):
+        for candidate in candidates:
+            game.check_guess(candidate)
+    loop_time = (time.perf_counter() - start) / (repeats // 10)
+    
+    start = time.perf_counter()
+    for _ in range(repeats):
+        score_guess_batch(guess, digits, masks)
+    batch_time = (time.perf_counter() - start) / repeats
+    
+    print(f"Оценка попытки против {len(candidates)} чисел:")
+    print(f"  check_guess в цикле: {loop_time * 1000:8.3f} мс")
+    print(f"  score_guess_batch:   {batch_time * 1000:8.3f} мс (x{loop_time / batch_time:.0f})")
+    
+    # Проверка попытки в партии: строковый алгоритм против check_guess на масках
+    print("\nПроверка попытки (строки против check_guess), мкс на вызов:")
+    for length in (3, 4, 5):
+        game = BullsAndCows()
+        guesses = list(all_secrets(length))
+        game.secret_number = guesses[len(guesses) // 2]
+        secret = game.secret_number
+        start = time.perf_counter()
+        for guess in guesses:
+            score_strings(guess, secret)
+        string_time = (time.perf_counter() - start) / len(guesses)
+        # Первый проход кодирует попытки, повторный берет коды из кэша encode_number
+        encode_number.cache_clear()
+        check_times = []
+        for _ in range(2):
+            start = time.perf_counter()
+            for guess in guesses:
+                game.check_guess(guess)
+            check_times.append((time.perf_counter() - start) / len(guesses))
+        cold_time, warm_time = check_times
+        print(f"  длина {length}: строки {string_time * 1e6:6.2f}, check_guess {warm_time * 1e6:6.2f} "
+              f"(первый проход {cold_time * 1e6:6.2f})")
+    
+    # Одна пара чисел: строковый путь против битовых масок
+    print("\nОценка одной пары (строки против масок), мкс на вызов:")
+    for base, length in [(10, 3), (10, 4), (10, 5), (10, 10), (16, 8), (16, 16)]:
+        game = BullsAndCows(base)
+        pairs = [(game.generate_unique_number(length), game.generate_unique_number(length))
+                 for _ in range(2000)]
+        codes = [(encode_number(a, base), encode_number(b, base)) for a, b in pairs]
+        start = time.perf_counter()
+        for a, b in pairs:
+            score_strings(a, b)
+        string_time = (time.perf_counter() - start) / len(pairs)
+        start = time.perf_counter()
+        for a, b in codes:
+            score_codes_pair(a, b, length, base)
+        code_time = (time.perf_counter() - start) / len(pairs)
+        print(f"  основание {base:2d}, длина {length:2d}: строки {string_time * 1e6:6.2f}, "
+              f"маски {code_time * 1e6:6.2f}")
+    
+    # Генерация чисел: по одному против массовой
+    print("\nГенерация секретных чисел, чисел/с:")
+    game = BullsAndCows(rng=random.Random(0))
+    rng = secret_streams(0, 1)[0]
+    for length in (3, 4, 5, 10):
+        count = 20000
+        start = time.perf_counter()
+        for _ in range(count):
+            game.generate_unique_number(length)
+        single_rate = count / (time.perf_counter() - start)
+        count = 1000000
+        start = time.perf_counter()
+        generate_secrets(count, length, rng)
+        bulk_rate = count / (time.perf_counter() - start)
+        print(f"  длина {length:2d}: generate_unique_number {single_rate:10.0f}, "
+              f"generate_secrets {bulk_rate:10.0f}")
+
+
+SIMULATION_STRATEGIES = ('random', 'minimax', 'expected', 'tree')
+
+
+def make_guesser(strategy, difficulty, rng=None):
+    """Компьютерный игрок по имени стратегии"""
+    if strategy == 'tree':
+        tree = load_decision_tree(difficulty)
+        if tree is None:
+            raise ValueError(f"Дерево для уровня '{difficulty}' не построено: python 2.py build-tree {difficulty}")
+        return TreeGuesser(tree)
+    return BullsAndCowsSolver(DIFFICULTY_LENGTHS[difficulty], strategy, rng)
+
+
+def _simulate_job(job):
+    """
+    Серия партий одной стратегии в процессе-исполнителе
+
+    Returns:
+        list: количество партий по числу попыток (индекс 0 - не угадано)
+    """
+    import numpy as np
+
+    strategy, difficulty, games, seed = job
+    rng = random.Random(seed)
+    game = BullsAndCows(rng=rng)
+    guesser = make_guesser(strategy, difficulty, rng)
+    secrets = secrets_to_strings(generate_secrets(games, DIFFICULTY_LENGTHS[difficulty],
+                                                  np.random.default_rng(seed)))
+    counts = [0] * (DIFFICULTY_ATTEMPTS[difficulty] + 1)
+    for secret in secrets:
+        game.new_game(difficulty, secret)
+        guesser.reset()
+        while not game.is_over:
+            guess = guesser.next_guess()
+            bulls, cows, is_correct = game.submit_guess(guess)
+            if not is_correct:
+                guesser.update(guess, bulls, cows)
+        counts[game.attempts if game.is_won else 0] += 1
+    return counts
+
+
+def simulate(strategy, difficulty='medium', games=1000, workers=None, seed=0, chunk=None):
+    """
+    Самоигра стратегии на пуле процессов
+
+    Партии делятся на блоки, у каждого блока свой поток случайных чисел,
+    порожденный из seed (SeedSequence.spawn), поэтому результат не зависит
+    от числа процессов.
+
+    Returns:
+        dict: распределение числа попыток, доля побед, партий в секунду
+    """
+    import time
+    import numpy as np
+    from concurrent.futures import ProcessPoolExecutor
+
+    workers = workers or os.cpu_count()
+    chunk = chunk or max(1, min(10000, games // (workers * 4) or 1))
+    sizes = [min(chunk, games - start) for start in range(0, games, chunk)]
+    streams = np.random.SeedSequence(seed).spawn(len(sizes))
+    jobs = [(strategy, difficulty, size, int(stream.generate_state(1, dtype=np.uint64)[0]))
+            for size, stream in zip(sizes, streams)]
+    # Таблицы (матрица ответов, дерево) готовим до запуска процессов,
+    # иначе каждый исполнитель начнет строить их сам
+    make_guesser(strategy, difficulty)
+
+    start = time.perf_counter()
+    if workers == 1:
+        results = [_simulate_job(job) for job in jobs]
+    else:
+        with ProcessPoolExecutor(max_workers=workers) as executor:
+            results = list(executor.map(_simulate_job, jobs))
+    elapsed = time.perf_counter() - start
+
+    counts = [sum(column) for column in zip(*results)]
+    wins = games - counts[0]
+    return {'strategy': strategy, 'games': games, 'counts': counts, 'wins': wins,
+            'win_rate': wins / games,
+            'average': sum(n * count for n, count in enumerate(counts)) / wins if wins else 0.0,
+            'elapsed': elapsed, 'games_per_sec': games / elapsed}
+
+
+def simulate_command(args):
+    """Самоигра стратегий: python 2.py simulate [параметры]"""
+    import argparse
+
+    parser = argparse.ArgumentParser(prog='2.py simulate', description='Самоигра стратегий')
+    parser.add_argument('--strategies', default='random,minimax,expected',
+                        help=f"стратегии через запятую из {', '.join(SIMULATION_STRATEGIES)}")
+    parser.add_argument('--difficulty', choices=list(DIFFICULTY_LENGTHS), default='medium')
+    parser.add_argument('--games', type=int, default=1000, help='партий на стратегию')
+    parser.add_argument('--workers', type=int, default=os.cpu_count(), help='число процессов')
+    parser.add_argument('--seed', type=int, default=0, help='зерно генератора')
+    options = parser.parse_args(args)
+
+    max_attempts = DIFFICULTY_ATTEMPTS[options.difficulty]
+    print(f"Уровень '{options.difficulty}', партий на стратегию: {options.games}, "
+          f"попыток: {max_attempts}, процессов: {options.workers}")
+    for strategy in options.strategies.split(','):
+        stats = simulate(strategy, options.difficulty, options.games, options.workers, options.seed)
+        print("\n" + "="*40)
+        print(f"{strategy}: побед {stats['win_rate']:.2%}, в среднем {stats['average']:.3f} попыток, "
+              f"{stats['games_per_sec']:.0f} партий/с")
+        for attempts in range(1, max_attempts + 1):
+            count = stats['counts'][attempts]
+            print(f"  {attempts:2d}: {count:8d} {'#' * round(40 * count / options.games)}")
+        print(f"  не угадано: {stats['counts'][0]}")
+
+
+def tree_command(args):
+    """Построение деревьев стратегии: python 2.py build-tree [уровни] [параметры]"""
+    import argparse
+
+    parser = argparse.ArgumentParser(prog='2.py build-tree', description='Построение дерева стратегии')
+    parser.add_argument('levels', nargs='*', default=list(DIFFICULTY_LENGTHS),
+                        choices=list(DIFFICULTY_LENGTHS), help='уровни сложности (по умолчанию все)')
+    parser.add_argument('--strategy', choices=['expected', 'minimax'], default=TREE_STRATEGY,
+                        help='expected - минимум среднего, minimax - минимум худшего случая')
+    parser.add_argument('--workers', type=int, default=os.cpu_count(), help='число процессов')
+    options = parser.parse_args(args)
+
+    for difficulty in options.levels:
+        stats = build_decision_tree(difficulty, options.strategy, options.workers)
+        print(f"{difficulty}: узлов {stats['nodes']}, чисел {stats['secrets']}, "
+              f"средняя глубина {stats['average']:.4f}, максимальная {stats['max']}, "
+              f"файл {stats['bytes'] / 1024:.1f} КБ, {stats['elapsed']:.1f} с")
+        print("  попыток:", ', '.join(f"{depth}: {count}" for depth, count
+                                      in enumerate(stats['histogram']) if count))
+
+
 def main():
     """Точка входа в программу"""
     game = BullsAndCows()
-    game.play_game()
+    if game.get_game_mode() == 'computer':
+        game.play_computer_guesser()
+    else:
+        game.play_game()
 
 if __name__ == "__main__":
-    main()
\ No newline at end of file
+    if len(sys.argv) > 1 and sys.argv[1] == "bench":
+        benchmark_command()
+    elif len(sys.argv) > 1 and sys.argv[1] == "simulate":
+        simulate_command(sys.argv[2:])
+    elif len(sys.argv) > 1 and sys.argv[1] == "build-tree":
+        tree_command(sys.argv[2:])
+    else:
+        main()
\ No newline at end of file
@@ -1,34 +1,554 @@
+import math
+import mmap
+import os
+import random
+import sys
+import time
+from functools import lru_cache
+
+# Все выигрышные линии поля 3x3 (номера клеток row * 3 + col)
+WIN_LINES = ((0, 1, 2), (3, 4, 5), (6, 7, 8),
+             (0, 3, 6), (1, 4, 7), (2, 5, 8),
+             (0, 4, 8), (2, 4, 6))
+# Порядок перебора ходов: центр, углы, края - раньше находит сильные ходы
+MOVE_ORDER = (4, 0, 2, 6, 8, 1, 3, 5, 7)
+CELL_CODES = {' ': 0, 'X': 1, 'O': 2}
+
+
+def _symmetries():
+    """
+    8 симметрий поля как перестановки клеток
+
+    Returns:
+        tuple: перестановки p, где новая клетка i берется из клетки p[i]
+    """
+    def rotate(r, c):
+        return c, 2 - r
+
+    def reflect(r, c):
+        return r, 2 - c
+
+    result = []
+    for flip in (False, True):
+        for turns in range(4):
+            perm = []
+            for cell in range(9):
+                r, c = divmod(cell, 3)
+                if flip:
+                    r, c = reflect(r, c)
+                for _ in range(turns):
+                    r, c = rotate(r, c)
+                perm.append(r * 3 + c)
+            result.append(tuple(perm))
+    return tuple(result)
+
+
+SYMMETRIES = _symmetries()
+
+
+def position_key(cells):
+    """Номер позиции в троичной записи (пусто - 0, X - 1, O - 2)"""
+    key = 0
+    for cell in reversed(cells):
+        key = key * 3 + CELL_CODES[cell]
+    return key
+
+
+def canonical_key(cells):
+    """
+    Каноническая форма позиции относительно 8 симметрий
+
+    Returns:
+        tuple: (наименьший номер среди симметричных позиций, индекс симметрии)
+    """
+    return min((position_key([cells[source] for source in perm]), index)
+               for index, perm in enumerate(SYMMETRIES))
+
+
+def line_winner(cells, cell):
+    """Проверка, замыкает ли клетка cell линию своего знака"""
+    player = cells[cell]
+    return any(cells[a] == cells[b] == cells[c] == player
+               for a, b, c in WIN_LINES if cell in (a, b, c))
+
+
+# Флаги записей таблицы транспозиций
+EXACT, LOWER, UPPER = 0, 1, 2
+
+
+def negamax(cells, player, alpha, beta, table):
+    """
+    Негамакс с альфа-бета отсечением и таблицей транспозиций
+
+    Позиции хранятся в таблице по канонической форме, ход - в координатах
+    канонической позиции. Оценка с точки зрения ходящего: 10 - число
+    занятых клеток после победного хода, 0 - ничья, отрицательная - поражение.
+
+    Args:
+        cells: плоское поле из 9 клеток (изменяется и восстанавливается)
+        player: ходящий игрок ('X' или 'O')
+        alpha, beta: окно поиска
+        table: таблица транспозиций {ключ: (оценка, флаг, ход)}
+
+    Returns:
+        tuple: (оценка, лучший ход в координатах cells)
+    """
+    key, symmetry = canonical_key(cells)
+    perm = SYMMETRIES[symmetry]
+    entry = table.get(key)
+    if entry is not None:
+        value, flag, move = entry
+        if flag == EXACT or (flag == LOWER and value >= beta) or (flag == UPPER and value <= alpha):
+            return value, perm[move]
+
+    opponent = 'O' if player == 'X' else 'X'
+    filled = 9 - cells.count(' ')
+    original_alpha = alpha
+    best_value, best_move = -100, None
+    for cell in MOVE_ORDER:
+        if cells[cell] != ' ':
+            continue
+        cells[cell] = player
+        if line_winner(cells, cell):
+            value = 10 - (filled + 1)
+        elif filled + 1 == 9:
+            value = 0
+        else:
+            value = -negamax(cells, opponent, -beta, -alpha, table)[0]
+        cells[cell] = ' '
+        if value > best_value:
+            best_value, best_move = value, cell
+        alpha = max(alpha, value)
+        if alpha >= beta:
+            break
+
+    if best_value <= original_alpha:
+        flag = UPPER
+    elif best_value >= beta:
+        flag = LOWER
+    else:
+        flag = EXACT
+    table[key] = (best_value, flag, perm.index(best_move))
+    return best_value, best_move
+
+
+@lru_cache(maxsize=None)
+def solved_table():
+    """
+    Решение всех достижимых позиций (строится один раз за процесс)
+
+    Обходятся все позиции, достижимые из пустого поля; для каждой еще не
+    решенной канонической позиции выполняется поиск с полным окном.
+
+    Returns:
+        dict: {номер позиции: (оценка, лучшая клетка)} для всех незавершенных
+        позиций; сама позиция - ключ, поэтому выбор хода - одно обращение
+    """
+    table = {}
+    moves = {}
+    seen = set()
+    stack = [[' '] * 9]
+    while stack:
+        cells = stack.pop()
+        key = position_key(cells)
+        if key in seen:
+            continue
+        seen.add(key)
+        filled = 9 - cells.count(' ')
+        player = 'X' if filled % 2 == 0 else 'O'
+        moves[key] = negamax(cells, player, -100, 100, table)
+        for cell in range(9):
+            if cells[cell] != ' ':
+                continue
+            child = cells[:]
+            child[cell] = player
+            if line_winner(child, cell) or filled + 1 == 9:
+                # Завершенные позиции тоже учитываем в счетчике
+                seen.add(position_key(child))
+            else:
+                stack.append(child)
+    solved_table.positions = len(seen)
+    solved_table.canonical = len(table)
+    return moves
+
+
+def perfect_move(board):
+    """
+    Лучший ход для текущей позиции
+
+    Args:
+        board: поле 3x3 (списки строк ' ', 'X', 'O')
+
+    Returns:
+        tuple: (строка, столбец) или None, если ходов нет
+    """
+    entry = solved_table().get(position_key([cell for row in board for cell in row]))
+    if entry is None:
+        return None
+    return divmod(entry[1], 3)
+
+
+# Троичный номер маски 3x3: сумма 3**клетка по установленным битам
+TERNARY = tuple(sum(3 ** cell for cell in range(9) if mask >> cell & 1) for mask in range(1 << 9))
+# Направления линий: горизонталь, вертикаль, две диагонали
+DIRECTIONS = ((0, 1), (1, 0), (1, 1), (1, -1))
+
+
+@lru_cache(maxsize=None)
+def line_masks(rows, cols, win_length):
+    """
+    Битовые маски выигрышных отрезков поля rows x cols
+
+    Через каждую клетку проходит не больше 4 * win_length отрезков, поэтому
+    проверка победы после хода стоит O(k), а не O(n^2).
+
+    Returns:
+        tuple: (все маски отрезков, маски отрезков через каждую клетку)
+    """
+    lines = []
+    for row in range(rows):
+        for col in range(cols):
+            for d_row, d_col in DIRECTIONS:
+                end_row, end_col = row + d_row * (win_length - 1), col + d_col * (win_length - 1)
+                if 0 <= end_row < rows and 0 <= end_col < cols:
+                    lines.append(sum(1 << ((row + d_row * i) * cols + col + d_col * i)
+                                     for i in range(win_length)))
+    by_cell = tuple(tuple(mask for mask in lines if mask >> cell & 1) for cell in range(rows * cols))
+    return tuple(lines), by_cell
+
+
+@lru_cache(maxsize=None)
+def near_masks(rows, cols, radius=2):
+    """Маски клеток на расстоянии не больше radius от каждой клетки (кандидаты ходов MCTS)"""
+    result = []
+    for row in range(rows):
+        for col in range(cols):
+            result.append(sum(1 << (r * cols + c)
+                              for r in range(max(0, row - radius), min(rows, row + radius + 1))
+                              for c in range(max(0, col - radius), min(cols, col + radius + 1))))
+    return tuple(result)
+
+
+def _bits(mask):
+    """Номера установленных битов"""
+    cells = []
+    while mask:
+        low = mask & -mask
+        cells.append(low.bit_length() - 1)
+        mask ^= low
+    return cells
+
+
+class MCTSNode:
+    """Узел дерева MCTS: ход, сделавший его игрок (0 - X, 1 - O) и статистика"""
+
+    __slots__ = ('move', 'parent', 'player', 'near', 'children', 'untried', 'wins', 'visits', 'terminal')
+
+    def __init__(self, move, parent, player, near):
+        self.move = move
+        self.parent = parent
+        self.player = player
+        self.near = near
+        self.children = []
+        self.untried = []
+        self.wins = 0.0
+        self.visits = 0
+        self.terminal = None  # победитель (0/1), -1 - ничья, None - партия продолжается
+
+
+def mcts_search(job):
+    """
+    Поиск Монте-Карло по дереву (UCT) с ограничением по времени
+
+    Кандидаты хода - пустые клетки рядом с уже занятыми, партии доигрываются
+    случайными ходами. Функция самостоятельна, чтобы выполняться в процессах.
+
+    Args:
+        job: (строки, столбцы, длина линии, (маска X, маска O), ходящий 0/1,
+              время в секундах, зерно ГСЧ, коэффициент исследования)
+
+    Returns:
+        tuple: ({клетка: (посещений, побед)} для корня, число симуляций)
+    """
+    rows, cols, win_length, masks, player, time_limit, seed, exploration = job
+    cell_lines = line_masks(rows, cols, win_length)[1]
+    near = near_masks(rows, cols)
+    rng = random.Random(seed)
+    full = (1 << (rows * cols)) - 1
+    occupied = masks[0] | masks[1]
+
+    root_near = 0
+    for cell in _bits(occupied):
+        root_near |= near[cell]
+    root = MCTSNode(None, None, 1 - player, root_near)
+    root.untried = _bits(root_near & ~occupied) if occupied else [(rows // 2) * cols + cols // 2]
+
+    deadline = time.perf_counter() + time_limit
+    playouts = 0
+    while playouts & 15 or time.perf_counter() < deadline:
+        node = root
+        state = [masks[0], masks[1]]
+        taken = occupied
+        # Выбор: спускаемся по UCT, пока узел полностью раскрыт
+        while node.terminal is None and not node.untried and node.children:
+            log_visits = math.log(node.visits)
+            node = max(node.children, key=lambda child: child.wins / child.visits
+                       + exploration * math.sqrt(log_visits / child.visits))
+            state[node.player] |= 1 << node.move
+            taken |= 1 << node.move
+        # Раскрытие: случайный еще не испробованный ход
+        if node.terminal is None and node.untried:
+            index = rng.randrange(len(node.untried))
+            node.untried[index], node.untried[-1] = node.untried[-1], node.untried[index]
+            move = node.untried.pop()
+            mover = 1 - node.player
+            state[mover] |= 1 << move
+            taken |= 1 << move
+            child = MCTSNode(move, node, mover, node.near | near[move])
+            mask = state[mover]
+            if any(mask & line == line for line in cell_lines[move]):
+                child.terminal = mover
+            elif taken == full:
+                child.terminal = -1
+            else:
+                child.untried = _bits(child.near & ~taken)
+            node.children.append(child)
+            node = child
+        # Симуляция: случайная партия до конца
+        if node.terminal is not None:
+            winner = node.terminal
+        else:
+            winner = -1
+            mover = 1 - node.player
+            empty = _bits(full & ~taken)
+            rng.shuffle(empty)
+            for cell in empty:
+                mask = state[mover] | (1 << cell)
+                state[mover] = mask
+                if any(mask & line == line for line in cell_lines[cell]):
+                    winner = mover
+                    break
+                mover = 1 - mover
+        # Обратное распространение
+        while node is not None:
+            node.visits += 1
+            if winner == node.player:
+                node.wins += 1
+            elif winner == -1:
+                node.wins += 0.5
+            node = node.parent
+        playouts += 1
+
+    return {child.move: (child.visits, child.wins) for child in root.children}, playouts
+
+
+class MCTSPlayer:
+    """
+    Компьютер для полей любого размера на основе MCTS
+
+    При workers > 1 деревья строятся независимо в нескольких процессах
+    (параллелизм по корню), статистика ходов корня суммируется.
+    """
+
+    def __init__(self, time_limit=1.0, workers=1, exploration=1.4, seed=None):
+        self.time_limit = time_limit
+        self.workers = workers
+        self.exploration = exploration
+        self.rng = random.Random(seed)
+        self.last_stats = None
+        self._executor = None  # пул процессов при workers > 1, создается при первом ходе
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    def close(self):
+        """Остановка пула процессов (игрок остается пригодным: пул создастся заново)"""
+        if self._executor is not None:
+            self._executor.shutdown()
+            self._executor = None
+
+    def choose_move(self, game):
+        """
+        Ход для текущей позиции игры
+
+        Returns:
+            tuple: (строка, столбец); статистика поиска - в last_stats
+        """
+        masks = (game.x_mask, game.o_mask)
+        player = 0 if game.current_player == 'X' else 1
+        jobs = [(game.rows, game.cols, game.win_length, masks, player, self.time_limit,
+                 self.rng.getrandbits(64), self.exploration) for _ in range(self.workers)]
+        start = time.perf_counter()
+        if self.workers == 1:
+            results = [mcts_search(jobs[0])]
+        else:
+            if self._executor is None:
+                from concurrent.futures import ProcessPoolExecutor
+
+                # Процессы запускаются один раз на игрока, а не на каждый ход
+                self._executor = ProcessPoolExecutor(max_workers=self.workers)
+            results = list(self._executor.map(mcts_search, jobs))
+        elapsed = time.perf_counter() - start
+
+        visits = {}
+        for moves, _ in results:
+            for move, (count, _) in moves.items():
+                visits[move] = visits.get(move, 0) + count
+        playouts = sum(count for _, count in results)
+        self.last_stats = {'playouts': playouts, 'elapsed': elapsed,
+                           'playouts_per_sec': playouts / elapsed}
+        return divmod(max(visits, key=visits.get), game.cols)
+
+
 class TicTacToe:
-    def __init__(self):
-        """Инициализация игры"""
-        self.board = [[' ' for _ in range(3)] for _ in range(3)]
+    # Без __dict__: на сервере живут сотни тысяч партий; таблицы линий общие (line_masks кэшируется)
+    __slots__ = ('rows', 'cols', 'win_length', 'lines', 'cell_lines', 'x_mask', 'o_mask',
+                 'current_player', 'game_over', 'winner', 'winning_mask', 'moves_count', 'history',
+                 'computer', 'ai')
+
+    def __init__(self, rows=3, cols=3, win_length=3):
+        """
+        Инициализация игры
+        
+        Args:
+            rows: Количество строк поля
+            cols: Количество столбцов поля
+            win_length: Сколько знаков подряд нужно для победы
+        """
+        self.rows = rows
+        self.cols = cols
+        self.win_length = win_length
+        self.lines, self.cell_lines = line_masks(rows, cols, win_length)
+        # Битовые доски: по маске занятых клеток на игрока
+        self.x_mask = 0
+        self.o_mask = 0
         self.current_player = 'X'  # X ходит первым
         self.game_over = False
         self.winner = None
+        self.winning_mask = 0
         self.moves_count = 0
+        self.history = []  # сделанные ходы (клетки) для отмены
+        self.computer = None  # знак компьютера или None для игры вдвоем
+        self.ai = None  # MCTSPlayer для полей, отличных от 3x3 (создается при первом ходе)
+    
+    @property
+    def board(self):
+        """
+        Снимок поля: кортеж строк из ' ', 'X', 'O' (строится по битовым доскам)
+
+        Поле хранится только в x_mask и o_mask, поэтому снимок неизменяемый:
+        запись вида game.board[row][col] = 'X' падает с TypeError, а не
+        теряется молча. Ход делается через make_move, позиция целиком - через
+        присваивание game.board.
+        """
+        x_mask, o_mask = self.x_mask, self.o_mask
+        cols = self.cols
+        return tuple(tuple('X' if x_mask >> (row * cols + col) & 1 else 'O' if o_mask >> (row * cols + col) & 1
+                           else ' ' for col in range(cols)) for row in range(self.rows))
+    
+    @board.setter
+    def board(self, board):
+        """
+        Установка позиции целиком с пересчетом состояния партии
+
+        Победитель, выигрышная линия, конец игры и очередь хода выводятся из
+        позиции; история ходов сбрасывается (порядок ходов неизвестен).
+        """
+        x_mask, o_mask = (sum(1 << (row * self.cols + col) for row in range(self.rows)
+                              for col in range(self.cols) if board[row][col] == player)
+                          for player in ('X', 'O'))
+        x_count, o_count = x_mask.bit_count(), o_mask.bit_count()
+        if x_count - o_count not in (0, 1):
+            raise ValueError(f"Недопустимая позиция: X - {x_count}, O - {o_count}")
+        last_player = 'X' if x_count > o_count else 'O'
+        self.x_mask, self.o_mask = x_mask, o_mask
+        self.moves_count = x_count + o_count
+        self.history = []
+        self.winner = None
+        self.winning_mask = 0
+        # Победить мог только игрок, сделавший последний ход
+        mask = x_mask if last_player == 'X' else o_mask
+        for line in self.lines:
+            if mask & line == line:
+                self.winner = last_player
+                self.winning_mask = line
+                break
+        self.game_over = self.winner is not None or self.moves_count == self.rows * self.cols
+        if self.game_over:
+            # Как после make_move: очередь остается за игроком, завершившим партию
+            self.current_player = last_player
+        else:
+            self.current_player = 'O' if last_player == 'X' else 'X'
+    
+    def position_key(self):
+        """Троичный номер позиции 3x3 (как position_key для плоского поля)"""
+        return TERNARY[self.x_mask] + 2 * TERNARY[self.o_mask]
+    
+    def is_classic(self):
+        """Классическое поле 3x3 с линией из трех"""
+        return (self.rows, self.cols, self.win_length) == (3, 3, 3)
+    
+    def computer_move(self):
+        """
+        Ход компьютера: идеальная игра по таблицам на 3x3 и 4x4, иначе MCTS
+        
+        Returns:
+            tuple: (строка, столбец)
+        """
+        if self.is_classic():
+            return divmod(solved_table()[self.position_key()][1], 3)
+        table = load_table4() if (self.rows, self.cols, self.win_length) == (4, 4, 4) else None
+        if table is not None:
+            return divmod(table.best_move(self.x_mask, self.o_mask)[0], 4)
+        if self.ai is None:
+            self.ai = MCTSPlayer()
+        return self.ai.choose_move(self)
         
+    def show_hint(self):
+        """Подсказка: оценка позиции и лучший ход по таблицам 3x3 и 4x4"""
+        if self.is_classic():
+            score, cell = solved_table()[self.position_key()]
+            value = WIN if score > 0 else LOSS if score < 0 else DRAW
+        elif (self.rows, self.cols, self.win_length) == (4, 4, 4) and load_table4() is not None:
+            cell, value = load_table4().best_move(self.x_mask, self.o_mask)
+        else:
+            print("Подсказка доступна для поля 3x3 и для 4x4 после python 3.py build-table4.")
+            return
+        print(f"\nПодсказка: при точной игре у {self.current_player} {VALUE_NAMES[value]}, "
+              f"лучший ход - клетка {divmod(cell, self.cols)}")
+    
+    def _print_header(self):
+        """Номера столбцов и верхняя граница поля"""
+        width = len(str(self.rows - 1))
+        print(" " * (width + 1) + "".join(f"{col:>3} " for col in range(self.cols)).rstrip())
+        print(" " * width + " +" + "---+" * self.cols)
+        return width
+    
     def display_board(self):
         """Отображение игрового поля"""
+        board = self.board
         print("\n" + "="*25)
         print("   КРЕСТИКИ-НОЛИКИ")
         print("="*25)
         print()
-        print("    0   1   2")  # Номера столбцов
-        print("  +---+---+---+")
+        width = self._print_header()  # Номера столбцов
         
-        for i in range(3):
-            print(f"{i} |", end="")  # Номер строки
-            for j in range(3):
-                print(f" {self.board[i][j]} |", end="")
+        for i in range(self.rows):
+            print(f"{i:>{width}} |", end="")  # Номер строки
+            for j in range(self.cols):
+                print(f" {board[i][j]} |", end="")
             print()
-            print("  +---+---+---+")
+            print(" " * width + " +" + "---+" * self.cols)
         print()
         
     def is_valid_move(self, row, col):
         """Проверка, является ли ход допустимым"""
-        if not (0 <= row <= 2 and 0 <= col <= 2):
+        if not (0 <= row < self.rows and 0 <= col < self.cols):
             return False
-        if self.board[row][col] != ' ':
+        if (self.x_mask | self.o_mask) >> (row * self.cols + col) & 1:
             return False
         return True
     
@@ -37,24 +557,32 @@ class TicTacToe:
         Выполнение хода
         
         Args:
-            row: Строка (0-2)
-            col: Столбец (0-2)
+            row: Строка (от 0 до rows - 1)
+            col: Столбец (от 0 до cols - 1)
             
         Returns:
             bool: True если ход выполнен, False если ход недопустим
         """
         if not self.is_valid_move(row, col):
             return False
-            
-        self.board[row][col] = self.current_player
+        
+        cell = row * self.cols + col
+        if self.current_player == 'X':
+            mask = self.x_mask = self.x_mask | (1 << cell)
+        else:
+            mask = self.o_mask = self.o_mask | (1 << cell)
         self.moves_count += 1
+        self.history.append(cell)
         
-        # Проверяем победу
-        if self.check_winner():
-            self.game_over = True
-            self.winner = self.current_player
+        # Проверяем победу только по линиям через сделанный ход
+        for line in self.cell_lines[cell]:
+            if mask & line == line:
+                self.game_over = True
+                self.winner = self.current_player
+                self.winning_mask = line
+                return True
         # Проверяем ничью
-        elif self.moves_count == 9:
+        if self.moves_count == self.rows * self.cols:
             self.game_over = True
         else:
             # Меняем игрока
@@ -62,70 +590,68 @@ class TicTacToe:
             
         return True
     
+    def undo_move(self):
+        """
+        Отмена последнего хода (для перебора вариантов)
+        
+        Returns:
+            bool: True если ход отменен, False если ходов не было
+        """
+        if not self.history:
+            return False
+        cell = self.history.pop()
+        if self.x_mask >> cell & 1:
+            player = 'X'
+            self.x_mask &= ~(1 << cell)
+        else:
+            player = 'O'
+            self.o_mask &= ~(1 << cell)
+        self.moves_count -= 1
+        self.current_player = player
+        self.game_over = False
+        self.winner = None
+        self.winning_mask = 0
+        return True
+    
     def check_winner(self):
         """Проверка, есть ли победитель"""
-        # Проверка строк
-        for i in range(3):
-            if self.board[i][0] == self.board[i][1] == self.board[i][2] != ' ':
-                return True
-        
-        # Проверка столбцов
-        for j in range(3):
-            if self.board[0][j] == self.board[1][j] == self.board[2][j] != ' ':
-                return True
-        
-        # Проверка диагоналей
-        if self.board[0][0] == self.board[1][1] == self.board[2][2] != ' ':
-            return True
-        if self.board[0][2] == self.board[1][1] == self.board[2][0] != ' ':
-            return True
-        
-        return False
+        return self.check_line_win() is not None
     
     def check_line_win(self):
         """
         Проверка, есть ли выигрышная линия и возвращение её координат
         """
-        # Проверка строк
-        for i in range(3):
-            if self.board[i][0] == self.board[i][1] == self.board[i][2] != ' ':
-                return [(i, 0), (i, 1), (i, 2)]
-        
-        # Проверка столбцов
-        for j in range(3):
-            if self.board[0][j] == self.board[1][j] == self.board[2][j] != ' ':
-                return [(0, j), (1, j), (2, j)]
-        
-        # Проверка диагоналей
-        if self.board[0][0] == self.board[1][1] == self.board[2][2] != ' ':
-            return [(0, 0), (1, 1), (2, 2)]
-        if self.board[0][2] == self.board[1][1] == self.board[2][0] != ' ':
-            return [(0, 2), (1, 1), (2, 0)]
-        
-        return None
+        line = self.winning_mask
+        if not line:
+            # Маски могли задать напрямую, минуя make_move - ищем линию по ним
+            line = next((mask for player_mask in (self.x_mask, self.o_mask)
+                         for mask in self.lines if player_mask & mask == mask), 0)
+        if not line:
+            return None
+        return [divmod(cell, self.cols) for cell in _bits(line)]
     
     def display_board_with_highlight(self):
         """Отображение доски с подсветкой выигрышной линии"""
         winning_line = self.check_line_win()
+        board = self.board
         
         print("\n" + "="*25)
         print("   КРЕСТИКИ-НОЛИКИ")
         print("="*25)
         print()
-        print("    0   1   2")
-        print("  +---+---+---+")
+        width = self._print_header()
         
-        for i in range(3):
-            print(f"{i} |", end="")
-            for j in range(3):
-                cell = self.board[i][j]
+        for i in range(self.rows):
+            print(f"{i:>{width}} |", end="")
+            for j in range(self.cols):
+                cell = board[i][j]
                 # Подсвечиваем выигрышную линию
                 if winning_line and (i, j) in winning_line:
                     print(f" *{cell}*|", end="")
                 else:
                     print(f" {cell} |", end="")
             print()
-            print("  +---+---+---+")
+            print(" " * width + " +" + "---+" * self.cols)
         print()
     
     def get_player_input(self):
@@ -133,50 +659,80 @@ class TicTacToe:
         while True:
             try:
                 print(f"Ход игрока {self.current_player}")
-                row = int(input("Введите номер строки (0-2): "))
-                col = int(input("Введите номер столбца (0-2): "))
+                row = int(input(f"Введите номер строки (0-{self.rows - 1}): "))
+                col = int(input(f"Введите номер столбца (0-{self.cols - 1}): "))
                 
-                if not (0 <= row <= 2 and 0 <= col <= 2):
-                    print("Ошибка! Координаты должны быть от 0 до 2.")
+                if not (0 <= row < self.rows and 0 <= col < self.cols):
+                    print(f"Ошибка! Строка должна быть от 0 до {self.rows - 1}, "
+                          f"столбец - от 0 до {self.cols - 1}.")
                     continue
                     
                 return row, col
                 
             except ValueError:
-                print("Ошибка! Введите числа от 0 до 2.")
+                print("Ошибка! Введите числа для координат.")
     
     def display_help(self):
         """Отображение справки по игре"""
         print("\n" + "="*40)
         print("              СПРАВКА")
         print("="*40)
+        print(f"Поле {self.rows}x{self.cols}, для победы нужно {self.win_length} в ряд.")
         print("Игровое поле имеет координаты:")
-        print("  Столбцы: 0, 1, 2 (слева направо)")
-        print("  Строки:  0, 1, 2 (сверху вниз)")
+        print(f"  Столбцы: 0 - {self.cols - 1} (слева направо)")
+        print(f"  Строки:  0 - {self.rows - 1} (сверху вниз)")
         print()
         print("Пример координат:")
         print("  (0,0) - левый верхний угол")
-        print("  (1,1) - центр поля")
-        print("  (2,2) - правый нижний угол")
+        print(f"  ({self.rows // 2},{self.cols // 2}) - центр поля")
+        print(f"  ({self.rows - 1},{self.cols - 1}) - правый нижний угол")
         print("="*40)
     
     def reset_game(self):
         """Сброс игры к начальному состоянию"""
-        self.board = [[' ' for _ in range(3)] for _ in range(3)]
+        self.x_mask = 0
+        self.o_mask = 0
         self.current_player = 'X'
         self.game_over = False
         self.winner = None
+        self.winning_mask = 0
         self.moves_count = 0
+        self.history = []
         print("\nИгра сброшена. Начинаем новую партию!")
     
+    def get_game_mode(self):
+        """Выбор режима игры: знак компьютера или None для игры вдвоем"""
+        print("\n" + "="*40)
+        print("Выберите режим игры:")
+        print("1. Два игрока - по умолчанию")
+        print("2. Против компьютера (вы играете за X)")
+        print("3. Против компьютера (вы играете за O)")
+        print("="*40)
+        
+        choice = input("Ваш выбор (1-3): ").strip()
+        if choice == '2':
+            return 'O'
+        elif choice == '3':
+            return 'X'
+        return None
+    
     def play_game(self):
         """Основной игровой цикл"""
         print("\nДобро пожаловать в игру 'Крестики-нолики'!")
+        self.computer = self.get_game_mode()
         print("Игрок X ходит первым.")
         print("Для справки введите 'помощь' или 'help'.")
         print("Для выхода введите 'выход' или 'exit'.")
         print("Для сброса игры введите 'сброс' или 'reset'.")
-        
+        print("Для подсказки введите 'подсказка' или 'hint'.")
+        try:
+            self._game_loop()
+        finally:
+            if self.ai is not None:
+                self.ai.close()
+    
+    def _game_loop(self):
+        """Ходы игроков и компьютера до выхода из игры"""
         while True:
             self.display_board()
             
@@ -195,6 +751,17 @@ class TicTacToe:
                     print("\nСпасибо за игру!")
                     break
             
+            # Ход компьютера
+            if self.current_player == self.computer:
+                row, col = self.computer_move()
+                self.make_move(row, col)
+                print(f"\nКомпьютер ({self.computer}) ходит на клетку ({row}, {col})")
+                if self.ai is not None:
+                    stats = self.ai.last_stats
+                    print(f"Симуляций: {stats['playouts']} за {stats['elapsed']:.2f} с "
+                          f"({stats['playouts_per_sec']:.0f} в секунду)")
+                continue
+            
             # Получаем ввод от игрока
             print(f"\nСейчас ходит: {self.current_player}")
             command = input("Введите координаты (строку столбец) или команду: ").strip().lower()
@@ -209,6 +776,9 @@ class TicTacToe:
             elif command in ['сброс', 'reset', 'новая игра']:
                 self.reset_game()
                 continue
+            elif command in ['подсказка', 'hint']:
+                self.show_hint()
+                continue
             
             # Парсим координаты
             try:
@@ -221,7 +791,7 @@ class TicTacToe:
                         continue
                 else:
                     # Пробуем разные форматы ввода
-                    if len(command) == 2 and command.isdigit():
+                    if len(command) == 2 and command.isdigit() and max(self.rows, self.cols) <= 10:
                         row, col = int(command[0]), int(command[1])
                     else:
                         print("Ошибка! Неверный формат ввода.")
@@ -239,10 +809,561 @@ class TicTacToe:
             except Exception as e:
                 print(f"Произошла ошибка: {e}")
 
-def main():
-    """Точка входа в программу"""
+@lru_cache(maxsize=None)
+def _line_matrix():
+    """Матрица (9, 8): столбец - индикатор клеток выигрышной линии"""
+    import numpy as np
+
+    lines = np.zeros((9, 8), dtype=np.int8)
+    for index, line in enumerate(WIN_LINES):
+        lines[list(line), index] = 1
+    return lines
+
+
+@lru_cache(maxsize=None)
+def perfect_move_array():
+    """Лучшая клетка для каждого троичного номера позиции (-1 - позиция не встречается)"""
+    import numpy as np
+
+    moves = np.full(3 ** 9, -1, dtype=np.int8)
+    for key, (_, cell) in solved_table().items():
+        moves[key] = cell
+    return moves
+
+
+def random_policy(boards, player, rng):
+    """Случайная свободная клетка для каждого поля"""
+    keys = rng.random(boards.shape)
+    keys[boards != 0] = -1.0
+    return keys.argmax(axis=1)
+
+
+def perfect_policy(boards, player, rng):
+    """Идеальный ход для каждого поля (таблица solved_table по троичному номеру)"""
+    import numpy as np
+
+    codes = np.where(boards == 1, 1, np.where(boards == -1, 2, 0)).astype(np.int32)
+    keys = codes @ (3 ** np.arange(9, dtype=np.int32))
+    return perfect_move_array()[keys]
+
+
+BATCH_POLICIES = {'random': random_policy, 'perfect': perfect_policy}
+
+
+def batch_self_play(games, x_policy='random', o_policy='random', seed=None):
+    """
+    Одновременная самоигра множества партий 3x3
+
+    Поля хранятся массивом (N, 9) int8 (1 - X, -1 - O, 0 - пусто), на каждом
+    шаге все незавершенные партии делают ход сразу, победа проверяется одним
+    умножением на матрицу 8 линий, завершенные партии исключаются.
+
+    Args:
+        games: количество партий
+        x_policy, o_policy: 'random', 'perfect' или функция
+            (поля (M, 9) int8, игрок 1/-1, np.random.Generator) -> клетки (M,)
+        seed: зерно генератора
+
+    Returns:
+        dict: moves (N, 9) int8 - клетки ходов по порядку (-1 - хода не было),
+        outcomes (N,) int8 - 1/-1 победитель, 0 - ничья, lengths (N,) - число ходов
+    """
+    import numpy as np
+
+    rng = np.random.default_rng(seed)
+    policies = {1: BATCH_POLICIES.get(x_policy, x_policy), -1: BATCH_POLICIES.get(o_policy, o_policy)}
+    lines = _line_matrix()
+    boards = np.zeros((games, 9), dtype=np.int8)
+    moves = np.full((games, 9), -1, dtype=np.int8)
+    outcomes = np.zeros(games, dtype=np.int8)
+    lengths = np.zeros(games, dtype=np.int8)
+    active = np.arange(games)
+    player = 1
+    for step in range(9):
+        if len(active) == 0:
+            break
+        current = boards[active]
+        rows = np.arange(len(active))
+        chosen = np.asarray(policies[player](current, player, rng), dtype=np.intp)
+        if (current[rows, chosen] != 0).any():
+            raise ValueError("Стратегия выбрала занятую клетку")
+        current[rows, chosen] = player
+        boards[active] = current
+        moves[active, step] = chosen
+        won = ((current @ lines) == 3 * player).any(axis=1)
+        outcomes[active[won]] = player
+        finished = won if step < 8 else np.ones(len(active), dtype=bool)
+        lengths[active[finished]] = step + 1
+        active = active[~finished]
+        player = -player
+    return {'moves': moves, 'outcomes': outcomes, 'lengths': lengths}
+
+
+def selfplay_command(args):
+    """Пакетная самоигра: python 3.py selfplay [параметры]"""
+    import argparse
+    import numpy as np
+
+    parser = argparse.ArgumentParser(prog='3.py selfplay', description='Пакетная самоигра 3x3')
+    parser.add_argument('--games', type=int, default=100000, help='количество партий')
+    parser.add_argument('--x', choices=list(BATCH_POLICIES), default='random', help='стратегия X')
+    parser.add_argument('--o', choices=list(BATCH_POLICIES), default='random', help='стратегия O')
+    parser.add_argument('--seed', type=int, default=0, help='зерно генератора')
+    parser.add_argument('--output', help='сохранить ходы и результаты в .npz')
+    options = parser.parse_args(args)
+
+    if 'perfect' in (options.x, options.o):
+        perfect_move_array()
+    start = time.perf_counter()
+    result = batch_self_play(options.games, options.x, options.o, options.seed)
+    elapsed = time.perf_counter() - start
+    outcomes = result['outcomes']
+    print(f"Партий: {options.games}, X ({options.x}) против O ({options.o})")
+    print(f"  победы X: {(outcomes == 1).mean():.2%}, победы O: {(outcomes == -1).mean():.2%}, "
+          f"ничьи: {(outcomes == 0).mean():.2%}, средняя длина: {result['lengths'].mean():.2f} хода")
+    print(f"  пакетно: {options.games / elapsed:10.0f} партий/с")
+    if options.output:
+        np.savez_compressed(options.output, **result)
+        print(f"  ходы сохранены в {options.output}")
+
+    # Тот же розыгрыш по одной партии через make_move (случайные ходы)
+    rng = random.Random(options.seed)
+    scalar_games = min(options.games, 20000)
+    start = time.perf_counter()
+    for _ in range(scalar_games):
+        game = TicTacToe()
+        cells = list(range(9))
+        rng.shuffle(cells)
+        for cell in cells:
+            game.make_move(*divmod(cell, 3))
+            if game.game_over:
+                break
+    scalar_rate = scalar_games / (time.perf_counter() - start)
+    print(f"  по одной (make_move, случайные ходы): {scalar_rate:10.0f} партий/с, "
+          f"ускорение x{options.games / elapsed / scalar_rate:.0f}")
+
+
+# Таблица 4x4 (4 в ряд): значение позиции для ходящего по 2 бита на позицию
+TABLE4_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'tictactoe4_table.bin')
+TABLE4_CHUNK = 1 << 18
+UNKNOWN, WIN, LOSS, DRAW = 0, 1, 2, 3
+VALUE_NAMES = {WIN: 'выигрыш', LOSS: 'проигрыш', DRAW: 'ничья'}
+
+
+def _layer_counts(n):
+    """Число знаков X и O после n ходов"""
+    return (n + 1) // 2, n // 2
+
+
+@lru_cache(maxsize=None)
+def table4_layout():
+    """
+    Размещение слоев таблицы 4x4 в файле
+
+    Позиции с n знаками образуют слой n; номер позиции в слое - номер
+    множества клеток X (комбинаторная система счисления) * C(16 - x, o) +
+    номер множества клеток O среди свободных. Начало слоя выровнено на 4
+    позиции, чтобы слой начинался с целого байта.
+
+    Returns:
+        tuple: (начала слоев в позициях, размеры слоев, всего позиций)
+    """
+    offsets, sizes = [], []
+    total = 0
+    for n in range(17):
+        x, o = _layer_counts(n)
+        offsets.append(total)
+        sizes.append(math.comb(16, x) * math.comb(16 - x, o))
+        total += (sizes[-1] + 3) // 4 * 4
+    return tuple(offsets), tuple(sizes), total
+
+
+@lru_cache(maxsize=None)
+def _subset_tables():
+    """
+    Таблицы для комбинаторной нумерации 16-битных масок
+
+    Returns:
+        tuple: (маски k-подмножеств по номеру для каждого k,
+                вклад младшего байта, вклад старшего байта при смещении)
+    """
+    import numpy as np
+
+    subsets = [[] for _ in range(17)]
+    for mask in range(1 << 16):
+        subsets[mask.bit_count()].append(mask)
+    low = np.zeros(256, dtype=np.int64)
+    high = np.zeros((9, 256), dtype=np.int64)
+    for byte in range(256):
+        bits = [i for i in range(8) if byte >> i & 1]
+        low[byte] = sum(math.comb(pos, j + 1) for j, pos in enumerate(bits))
+        for offset in range(9):
+            high[offset, byte] = sum(math.comb(pos + 8, j + offset + 1) for j, pos in enumerate(bits))
+    tables = [None] * 17
+    for k in range(17):
+        masks = np.array(subsets[k], dtype=np.int64)
+        ranks = low[masks & 255] + high[np.array([bin(m & 255).count('1') for m in subsets[k]]), masks >> 8]
+        ordered = np.empty(len(masks), dtype=np.int64)
+        ordered[ranks] = masks
+        tables[k] = ordered
+    return tables, low, high
+
+
+def _subset_rank(masks):
+    """Номер маски среди подмножеств той же мощности (массивы NumPy)"""
+    import numpy as np
+
+    _, low, high = _subset_tables()
+    low_bits = masks & 255
+    offset = np.zeros_like(masks)
+    for bit in range(8):
+        offset += (low_bits >> bit) & 1
+    return low[low_bits] + high[offset, masks >> 8]
+
+
+def _compress(masks, free):
+    """Биты masks на позициях free, сжатые подряд (аналог pext)"""
+    import numpy as np
+
+    result = np.zeros_like(masks)
+    index = np.zeros_like(masks)
+    for bit in range(16):
+        is_free = (free >> bit) & 1
+        result |= ((masks >> bit) & 1 & is_free) << index
+        index += is_free
+    return result
+
+
+def _expand(compressed, free):
+    """Обратное к _compress: раскладка битов по позициям free (аналог pdep)"""
+    import numpy as np
+
+    result = np.zeros_like(compressed)
+    index = np.zeros_like(compressed)
+    for bit in range(16):
+        is_free = (free >> bit) & 1
+        result |= ((compressed >> index) & is_free) << bit
+        index += is_free
+    return result
+
+
+@lru_cache(maxsize=None)
+def _line_masks4():
+    import numpy as np
+
+    return np.array(line_masks(4, 4, 4)[0], dtype=np.int64)
+
+
+def _has_line(masks):
+    """Есть ли у масок выигрышная линия 4x4"""
+    import numpy as np
+
+    result = np.zeros(len(masks), dtype=bool)
+    for line in _line_masks4().tolist():
+        result |= (masks & line) == line
+    return result
+
+
+def _table4_job(job):
+    """
+    Значения диапазона позиций слоя n по уже посчитанному слою n + 1
+
+    Returns:
+        tuple: (начало диапазона, значения, упакованные по 4 в байт)
+    """
+    import numpy as np
+
+    n, start, end, path = job
+    offsets, sizes, total = table4_layout()
+    tables = _subset_tables()[0]
+    x, o = _layer_counts(n)
+    ranks = np.arange(start, end, dtype=np.int64)
+    x_rank, o_rank = np.divmod(ranks, math.comb(16 - x, o))
+    x_masks = tables[x][x_rank]
+    o_masks = _expand(tables[o][o_rank], ~x_masks & 0xFFFF)
+    mover, waiting = (x_masks, o_masks) if n % 2 == 0 else (o_masks, x_masks)
+
+    values = np.full(len(ranks), DRAW, dtype=np.uint8)
+    if n < 16:
+        data = np.memmap(path, dtype=np.uint8, mode='r')
+        child_x, child_o = _layer_counts(n + 1)
+        child_size = math.comb(16 - child_x, child_o)
+        has_win = np.zeros(len(ranks), dtype=bool)
+        has_draw = np.zeros(len(ranks), dtype=bool)
+        occupied = x_masks | o_masks
+        for cell in range(16):
+            empty = ((occupied >> cell) & 1) == 0
+            moved = mover[empty] | (1 << cell)
+            new_x, new_o = (moved, o_masks[empty]) if n % 2 == 0 else (x_masks[empty], moved)
+            child = offsets[n + 1] + _subset_rank(new_x) * child_size + \
+                _subset_rank(_compress(new_o, ~new_x & 0xFFFF))
+            child_values = (data[child >> 2] >> ((child & 3) * 2).astype(np.uint8)) & 3
+            has_win[empty] |= child_values == LOSS
+            has_draw[empty] |= child_values == DRAW
+        values[:] = LOSS
+        values[has_draw] = DRAW
+        values[has_win] = WIN
+        del data
+    # Соперник уже собрал линию - партия проиграна
+    values[_has_line(waiting)] = LOSS
+
+    values = np.concatenate([values, np.zeros(-len(values) % 4, dtype=np.uint8)])
+    packed = values[0::4] | (values[1::4] << 2) | (values[2::4] << 4) | (values[3::4] << 6)
+    return start, packed
+
+
+def build_table4(workers=None, path=TABLE4_PATH):
+    """
+    Ретроградный анализ 4x4 (4 в ряд) по слоям числа ходов
+
+    Слои считаются от заполненного поля к пустому: значение позиции слоя n
+    определяется значениями позиций слоя n + 1. Диапазоны одного слоя
+    считаются параллельно, результат записывается в файл по 2 бита на позицию.
+
+    Returns:
+        float: время построения в секундах
+    """
+    import numpy as np
+    from concurrent.futures import ProcessPoolExecutor
+
+    start_time = time.perf_counter()
+    offsets, sizes, total = table4_layout()
+    _subset_tables()  # строим таблицы до запуска процессов
+    tmp_path = path + '.tmp'
+    with open(tmp_path, 'wb') as f:
+        f.truncate(total // 4)
+    data = np.memmap(tmp_path, dtype=np.uint8, mode='r+')
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        for n in range(16, -1, -1):
+            jobs = [(n, start, min(start + TABLE4_CHUNK, sizes[n]), tmp_path)
+                    for start in range(0, sizes[n], TABLE4_CHUNK)]
+            for start, packed in executor.map(_table4_job, jobs):
+                first = (offsets[n] + start) // 4
+                data[first:first + len(packed)] = packed
+            data.flush()
+    del data
+    os.replace(tmp_path, path)
+    load_table4.cache_clear()
+    return time.perf_counter() - start_time
+
+
+class Table4:
+    """Готовая таблица 4x4, отображенная в память: значение и лучший ход за O(1)"""
+
+    def __init__(self, path=TABLE4_PATH):
+        self.offsets, self.sizes, _ = table4_layout()
+        with open(path, 'rb') as f:
+            self.data = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+
+    @staticmethod
+    def _rank(mask):
+        """Номер маски среди подмножеств той же мощности"""
+        rank = 0
+        j = 0
+        while mask:
+            low = mask & -mask
+            j += 1
+            rank += math.comb(low.bit_length() - 1, j)
+            mask ^= low
+        return rank
+
+    def value(self, x_mask, o_mask):
+        """Значение позиции для ходящего (WIN, LOSS или DRAW)"""
+        n = (x_mask | o_mask).bit_count()
+        x, o = _layer_counts(n)
+        free = ~x_mask & 0xFFFF
+        compressed = 0
+        index = 0
+        for bit in range(16):
+            if free >> bit & 1:
+                compressed |= (o_mask >> bit & 1) << index
+                index += 1
+        rank = self.offsets[n] + self._rank(x_mask) * math.comb(16 - x, o) + self._rank(compressed)
+        return (self.data[rank >> 2] >> ((rank & 3) * 2)) & 3
+
+    def best_move(self, x_mask, o_mask):
+        """
+        Лучшая клетка для ходящего
+
+        Returns:
+            tuple: (клетка или None, значение позиции для ходящего)
+        """
+        occupied = x_mask | o_mask
+        x_to_move = occupied.bit_count() % 2 == 0
+        best_cell, best_value = None, None
+        # Ход ведет к проигрышу соперника - выигрыш, к ничьей - ничья
+        preference = {LOSS: 0, DRAW: 1, WIN: 2}
+        for cell in range(16):
+            if occupied >> cell & 1:
+                continue
+            if x_to_move:
+                child = self.value(x_mask | (1 << cell), o_mask)
+            else:
+                child = self.value(x_mask, o_mask | (1 << cell))
+            if best_value is None or preference[child] < preference[best_value]:
+                best_cell, best_value = cell, child
+        return best_cell, {LOSS: WIN, DRAW: DRAW, WIN: LOSS}.get(best_value, DRAW)
+
+
+@lru_cache(maxsize=None)
+def load_table4():
+    """Таблица 4x4 с диска или None, если она еще не построена"""
+    if not os.path.exists(TABLE4_PATH):
+        return None
+    return Table4()
+
+
+def table4_command(args):
+    """Построение таблицы 4x4: python 3.py build-table4 [процессы]"""
+    workers = int(args[0]) if args else os.cpu_count()
+    elapsed = build_table4(workers)
+    offsets, sizes, total = table4_layout()
+    table = load_table4()
+    print(f"Позиций: {sum(sizes)}, файл {os.path.getsize(TABLE4_PATH) / 1024 / 1024:.2f} МБ, "
+          f"построено за {elapsed:.1f} с, процессов: {workers}")
+    cell, value = table.best_move(0, 0)
+    print(f"Пустое поле: {VALUE_NAMES[value]} для X")
+    repeats = 10000
+    start = time.perf_counter()
+    for _ in range(repeats):
+        table.value(0b0000011000010001, 0b0001000010000010)
+    print(f"Чтение значения: {(time.perf_counter() - start) / repeats * 1e6:.2f} мкс")
+
+
+class ListTicTacToe:
+    """Прежняя реализация хода на списках строк (для сравнения в бенчмарке)"""
+
+    def __init__(self):
+        self.board = [[' ' for _ in range(3)] for _ in range(3)]
+        self.current_player = 'X'
+        self.game_over = False
+        self.winner = None
+        self.moves_count = 0
+
+    def make_move(self, row, col):
+        if not (0 <= row <= 2 and 0 <= col <= 2) or self.board[row][col] != ' ':
+            return False
+        self.board[row][col] = self.current_player
+        self.moves_count += 1
+        if self.check_winner():
+            self.game_over = True
+            self.winner = self.current_player
+        elif self.moves_count == 9:
+            self.game_over = True
+        else:
+            self.current_player = 'O' if self.current_player == 'X' else 'X'
+        return True
+
+    def check_winner(self):
+        board = self.board
+        for i in range(3):
+            if board[i][0] == board[i][1] == board[i][2] != ' ':
+                return True
+        for j in range(3):
+            if board[0][j] == board[1][j] == board[2][j] != ' ':
+                return True
+        if board[0][0] == board[1][1] == board[2][2] != ' ':
+            return True
+        if board[0][2] == board[1][1] == board[2][0] != ' ':
+            return True
+        return False
+
+
+def benchmark_command():
+    """Сравнение ходов на битовых досках и на списках строк: python 3.py bench"""
+    import random
+
+    rng = random.Random(0)
+    games = []
+    for _ in range(20000):
+        cells = list(range(9))
+        rng.shuffle(cells)
+        games.append([divmod(cell, 3) for cell in cells])
+    
+    results = {}
+    for name, factory in (('списки строк', ListTicTacToe), ('битовые доски', TicTacToe)):
+        moves = 0
+        start = time.perf_counter()
+        for game_moves in games:
+            game = factory()
+            for row, col in game_moves:
+                if game.game_over:
+                    break
+                game.make_move(row, col)
+                moves += 1
+        elapsed = time.perf_counter() - start
+        results[name] = moves / elapsed
+        print(f"{name:>14}: {moves / elapsed:10.0f} ходов/с")
+    
+    # Ход + отмена, как при переборе
     game = TicTacToe()
+    start = time.perf_counter()
+    for _ in range(100000):
+        for cell in range(9):
+            game.make_move(*divmod(cell, 3))
+            game.undo_move()
+    print(f"{'ход + отмена':>14}: {900000 / (time.perf_counter() - start):10.0f} пар/с")
+    print(f"Ускорение: x{results['битовые доски'] / results['списки строк']:.2f}")
+
+
+def solve_command():
+    """Решение всех позиций и статистика таблицы: python 3.py solve"""
+    start = time.perf_counter()
+    moves = solved_table()
+    elapsed = time.perf_counter() - start
+    value, cell = moves[0]
+    print(f"Достижимых позиций: {solved_table.positions}, незавершенных: {len(moves)}, "
+          f"канонических в таблице транспозиций: {solved_table.canonical}")
+    print(f"Построено за {elapsed * 1000:.1f} мс, оценка пустого поля: {value} "
+          f"(лучший первый ход - клетка {divmod(cell, 3)})")
+    
+    board = [[' '] * 3 for _ in range(3)]
+    repeats = 100000
+    start = time.perf_counter()
+    for _ in range(repeats):
+        perfect_move(board)
+    print(f"Выбор хода: {(time.perf_counter() - start) / repeats * 1e6:.2f} мкс")
+
+
+def mcts_command(args):
+    """Замер скорости MCTS: python 3.py mcts [строки столбцы длина [время [процессы]]]"""
+    rows, cols, win_length = (int(arg) for arg in args[:3]) if len(args) >= 3 else (15, 15, 5)
+    time_limit = float(args[3]) if len(args) > 3 else 1.0
+    workers = int(args[4]) if len(args) > 4 else 1
+    
+    game = TicTacToe(rows, cols, win_length)
+    total_playouts = 0
+    total_time = 0.0
+    with MCTSPlayer(time_limit, workers, seed=0) as player:
+        while not game.game_over and game.moves_count < 6:
+            row, col = player.choose_move(game)
+            game.make_move(row, col)
+            stats = player.last_stats
+            total_playouts += stats['playouts']
+            total_time += stats['elapsed']
+            print(f"Ход {game.moves_count}: ({row}, {col}), симуляций {stats['playouts']}, "
+                  f"{stats['playouts_per_sec']:.0f} в секунду")
+    print(f"Поле {rows}x{cols}, {win_length} в ряд, процессов {workers}: "
+          f"в среднем {total_playouts / total_time:.0f} симуляций в секунду")
+
+
+def main(rows=3, cols=3, win_length=3):
+    """Точка входа в программу"""
+    game = TicTacToe(rows, cols, win_length)
     game.play_game()
 
 if __name__ == "__main__":
-    main()
\ No newline at end of file
+    if len(sys.argv) > 1 and sys.argv[1] == "solve":
+        solve_command()
+    elif len(sys.argv) > 1 and sys.argv[1] == "bench":
+        benchmark_command()
+    elif len(sys.argv) > 1 and sys.argv[1] == "build-table4":
+        table4_command(sys.argv[2:])
+    elif len(sys.argv) > 1 and sys.argv[1] == "selfplay":
+        selfplay_command(sys.argv[2:])
+    elif len(sys.argv) > 1 and sys.argv[1] == "mcts":
+        mcts_command(sys.argv[2:])
+    elif len(sys.argv) > 1 and sys.argv[1] == "play":
+        main(*(int(arg) for arg in sys.argv[2:5]))
+    else:
+        main()
\ No newline at end of file
@@ -1,21 +1,145 @@
+import argparse
+import mmap
+import os
 import random
+import struct
+import sys
+import time
+from functools import lru_cache
+
+# Словарь общий для всех партий: неизменяемый кортеж, у экземпляров только ссылка
+WORDS = (
+    # Простые слова (4-5 букв)
+    'кот', 'дом', 'лес', 'ночь', 'вода', 'ветер', 'солнце', 'река',
+    'книга', 'стол', 'окно', 'дверь', 'город', 'улица', 'школа',
+
+    # Средней сложности (6-8 букв)
+    'компьютер', 'программа', 'библиотека', 'телефон', 'автомобиль',
+    'погода', 'работа', 'праздник', 'музыка', 'картина', 'история',
+
+    # Сложные слова (9+ букв)
+    'государство', 'университет', 'эксперимент', 'путешествие',
+    'достопримечательность', 'интеллект', 'конституция'
+)
+
+RUSSIAN_LETTERS = 'АБВГДЕЁЖЗИЙКЛМНОПРСТУФХЦЧШЩЪЫЬЭЮЯ'
+
+# Внешний словарь: текстовый файл UTF-8 по слову в строке и индекс смещений к нему
+# (файл <словарь>.idx строится командой build-index)
+DICTIONARY_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'hangman_words.txt')
+INDEX_MAGIC = b'HANGIDX1'
+INDEX_HEADER = struct.Struct('<8sQQ')  # метка, размер словаря в байтах, число слов
+INDEX_ENTRY = struct.Struct('<IB')  # смещение слова в словаре и его длина в байтах
+MAX_WORD_LENGTH = 40
+DIFFICULTY_LENGTHS = {'easy': (1, 5), 'medium': (6, 8), 'hard': (9, MAX_WORD_LENGTH)}
+
+
+def build_word_index(path=DICTIONARY_PATH):
+    """
+    Построение индекса словаря: смещения подходящих слов, упорядоченные по длине
+
+    Файл индекса: заголовок, начала групп слов каждой длины (MAX_WORD_LENGTH + 2
+    чисел uint32) и записи INDEX_ENTRY. Слова одной длины идут подряд, поэтому
+    слова из диапазона длин - непрерывный отрезок записей.
+
+    Args:
+        path: Путь к словарю
+
+    Returns:
+        int: Число слов в индексе
+    """
+    groups = [[] for _ in range(MAX_WORD_LENGTH + 1)]
+    offset = 0
+    with open(path, 'rb') as f:
+        for line in f:
+            raw = line.strip().removeprefix(b'\xef\xbb\xbf')  # BOM в начале файла
+            word = raw.decode('utf-8', errors='replace').upper()
+            if 0 < len(word) <= MAX_WORD_LENGTH and all(letter in RUSSIAN_LETTERS for letter in word):
+                groups[len(word)].append((offset + line.find(raw), len(raw)))
+            offset += len(line)
+    count = sum(len(group) for group in groups)
+    if count == 0:
+        raise ValueError(f"в словаре {path} нет слов из русских букв")
+
+    starts = [0] * (MAX_WORD_LENGTH + 2)
+    for length in range(1, MAX_WORD_LENGTH + 2):
+        starts[length] = starts[length - 1] + len(groups[length - 1])
+    tmp_path = path + '.idx.tmp'
+    with open(tmp_path, 'wb') as f:
+        f.write(INDEX_HEADER.pack(INDEX_MAGIC, offset, count))
+        f.write(struct.pack(f'<{len(starts)}I', *starts))
+        for group in groups:
+            f.write(b''.join(INDEX_ENTRY.pack(*entry) for entry in group))
+    os.replace(tmp_path, path + '.idx')
+    load_word_index.cache_clear()
+    return count
+
+
+class WordIndex:
+    """Словарь на диске, отображенный в память: случайное слово нужной длины за O(1)"""
+
+    def __init__(self, path=DICTIONARY_PATH):
+        with open(path, 'rb') as f:
+            self.data = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        with open(path + '.idx', 'rb') as f:
+            self.index = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        magic, size, self.count = INDEX_HEADER.unpack_from(self.index)
+        if magic != INDEX_MAGIC or size != len(self.data):
+            raise ValueError(f"индекс словаря устарел: python 4.py build-index {path}")
+        self.starts = struct.unpack_from(f'<{MAX_WORD_LENGTH + 2}I', self.index, INDEX_HEADER.size)
+        self.entries = INDEX_HEADER.size + 4 * (MAX_WORD_LENGTH + 2)
+
+    def __len__(self):
+        return self.count
+
+    def __deepcopy__(self, memo):
+        # Неизменяемый общий словарь: копии партий ссылаются на тот же объект
+        return self
+
+    def __getitem__(self, number):
+        """Слово с номером number (слова упорядочены по длине)"""
+        if not 0 <= number < self.count:
+            raise IndexError("номер слова вне словаря")
+        offset, size = INDEX_ENTRY.unpack_from(self.index, self.entries + INDEX_ENTRY.size * number)
+        return self.data[offset:offset + size].decode('utf-8')
+
+    def count_words(self, low=1, high=MAX_WORD_LENGTH):
+        """Число слов длиной от low до high букв"""
+        low, high = max(low, 1), min(high, MAX_WORD_LENGTH)
+        if low > high:
+            return 0
+        return self.starts[high + 1] - self.starts[low]
+
+    def choice(self, low=1, high=MAX_WORD_LENGTH, rng=random):
+        """Случайное слово длиной от low до high букв"""
+        if self.count_words(low, high) == 0:
+            raise ValueError(f"в словаре нет слов длиной от {low} до {high} букв")
+        return self[rng.randrange(self.starts[max(low, 1)], self.starts[min(high, MAX_WORD_LENGTH) + 1])]
+
+
+@lru_cache(maxsize=None)
+def load_word_index(path=DICTIONARY_PATH):
+    """Словарь с диска (один на все партии) или None, если нет словаря или индекса"""
+    if not (os.path.exists(path) and os.path.exists(path + '.idx')):
+        return None
+    return WordIndex(path)
+
 
 class Hangman:
-    def __init__(self):
-        """Инициализация игры"""
-        self.words = [
-            # Простые слова (4-5 букв)
-            'кот', 'дом', 'лес', 'ночь', 'вода', 'ветер', 'солнце', 'река',
-            'книга', 'стол', 'окно', 'дверь', 'город', 'улица', 'школа',
-            
-            # Средней сложности (6-8 букв)
-            'компьютер', 'программа', 'библиотека', 'телефон', 'автомобиль',
-            'погода', 'работа', 'праздник', 'музыка', 'картина', 'история',
-            
-            # Сложные слова (9+ букв)
-            'государство', 'университет', 'эксперимент', 'путешествие',
-            'достопримечательность', 'интеллект', 'конституция'
-        ]
+    __slots__ = ('words', 'word', 'guessed_letters', 'wrong_letters', 'max_attempts',
+                 'attempts_left', 'game_over', 'won')
+
+    def __init__(self, words=None):
+        """
+        Инициализация игры
+
+        Args:
+            words: Источник слов - последовательность или WordIndex; по умолчанию
+                внешний словарь, если для него построен индекс, иначе WORDS
+        """
+        if words is None:
+            words = load_word_index()
+        self.words = words if words is not None else WORDS
         
         self.word = ''
         self.guessed_letters = set()
@@ -25,9 +149,23 @@ class Hangman:
         self.game_over = False
         self.won = False
         
-    def select_word(self):
-        """Выбор случайного слова"""
-        self.word = random.choice(self.words).upper()
+    def select_word(self, length=None, difficulty=None):
+        """
+        Выбор случайного слова
+
+        Args:
+            length: Точная длина слова
+            difficulty: Сложность из DIFFICULTY_LENGTHS (если длина не задана)
+        """
+        low, high = (length, length) if length else DIFFICULTY_LENGTHS.get(difficulty, (1, MAX_WORD_LENGTH))
+        if isinstance(self.words, WordIndex):
+            word = self.words.choice(low, high)
+        else:
+            candidates = [word for word in self.words if low <= len(word) <= high]
+            if not candidates:
+                raise ValueError(f"нет слов длиной от {low} до {high} букв")
+            word = random.choice(candidates)
+        self.word = word.upper()
         self.attempts_left = self.max_attempts
         self.guessed_letters = set()
         self.wrong_letters = set()
@@ -156,6 +294,25 @@ class Hangman:
         
         print("="*50)
     
+    def validate_guess(self, guess):
+        """
+        Проверка ввода игрока
+        
+        Args:
+            guess: Буква или слово, введенное игроком
+            
+        Returns:
+            tuple: (корректен ли ввод, сообщение об ошибке)
+        """
+        guess = guess.upper().strip()
+        if len(guess) > 1:
+            return True, ""
+        if len(guess) != 1:
+            return False, "Пожалуйста, введите одну букву или всё слово!"
+        if not guess.isalpha() or guess not in RUSSIAN_LETTERS:
+            return False, "Пожалуйста, введите русскую букву!"
+        return True, ""
+    
     def process_guess(self, guess):
         """
         Обработка предположения игрока
@@ -166,6 +323,9 @@ class Hangman:
         Returns:
             str: Сообщение о результате
         """
+        is_valid, error_msg = self.validate_guess(guess)
+        if not is_valid:
+            return error_msg
         guess = guess.upper().strip()
         
         # Проверка на ввод слова целиком
@@ -180,13 +340,6 @@ class Hangman:
                     self.game_over = True
                 return "Неверное слово!"
         
-        # Проверка на одну букву
-        if len(guess) != 1:
-            return "Пожалуйста, введите одну букву или всё слово!"
-        
-        if not guess.isalpha() or guess not in 'АБВГДЕЁЖЗИЙКЛМНОПРСТУФХЦЧШЩЪЫЬЭЮЯ':
-            return "Пожалуйста, введите русскую букву!"
-        
         # Проверка, не вводилась ли уже эта буква
         if guess in self.guessed_letters:
             return f"Буква '{guess}' уже была!"
@@ -254,12 +407,18 @@ class Hangman:
         """)
         print("="*60)
     
-    def play_game(self):
-        """Основной игровой цикл"""
+    def play_game(self, length=None, difficulty=None):
+        """
+        Основной игровой цикл
+
+        Args:
+            length: Длина загадываемых слов
+            difficulty: Сложность загадываемых слов
+        """
         print("\nДобро пожаловать в игру 'Виселица'!")
         print("Угадайте слово по буквам!")
         
-        self.select_word()
+        self.select_word(length, difficulty)
         self.display_rules()
         
         while True:
@@ -279,7 +438,7 @@ class Hangman:
                 
                 play_again = input("\nХотите сыграть еще раз? (да/нет): ").lower()
                 if play_again in ['да', 'д', 'yes', 'y']:
-                    self.select_word()
+                    self.select_word(length, difficulty)
                     print("\nНовая игра начинается!")
                     continue
                 else:
@@ -309,7 +468,7 @@ class Hangman:
                 print(f"\nВы сдались. Загаданное слово было: {self.word}")
                 play_again = input("\nХотите сыграть еще раз? (да/нет): ").lower()
                 if play_again in ['да', 'д', 'yes', 'y']:
-                    self.select_word()
+                    self.select_word(length, difficulty)
                     print("\nНовая игра начинается!")
                     continue
                 else:
@@ -321,10 +480,60 @@ class Hangman:
                 result = self.process_guess(guess)
                 print(f"\n{result}")
 
+def index_command(args):
+    """Построение индекса словаря: python 4.py build-index [словарь]"""
+    path = args[0] if args else DICTIONARY_PATH
+    start = time.perf_counter()
+    count = build_word_index(path)
+    elapsed = time.perf_counter() - start
+    print(f"Слов: {count}, словарь {os.path.getsize(path) / 1024 / 1024:.2f} МБ, "
+          f"индекс {os.path.getsize(path + '.idx') / 1024 / 1024:.2f} МБ, построено за {elapsed:.2f} с")
+
+    start = time.perf_counter()
+    words = WordIndex(path)
+    print(f"Открытие словаря: {(time.perf_counter() - start) * 1000:.3f} мс")
+    for level, (low, high) in DIFFICULTY_LENGTHS.items():
+        print(f"  {level:>6}: {words.count_words(low, high)} слов")
+    repeats = 100000
+    start = time.perf_counter()
+    for _ in range(repeats):
+        words.choice(*DIFFICULTY_LENGTHS['medium'])
+    print(f"Выбор слова: {(time.perf_counter() - start) / repeats * 1e6:.2f} мкс")
+
+
+def play_command(args):
+    """Игра с настройками: python 4.py play [--dict словарь] [--length N | --difficulty уровень]"""
+    parser = argparse.ArgumentParser(prog='4.py play', description='Виселица')
+    parser.add_argument('--dict', default=DICTIONARY_PATH, help='словарь с построенным индексом')
+    parser.add_argument('--length', type=int, help='длина загадываемых слов')
+    parser.add_argument('--difficulty', choices=list(DIFFICULTY_LENGTHS), help='сложность')
+    options = parser.parse_args(args)
+    try:
+        words = load_word_index(options.dict)
+        if words is None:
+            print(f"Нет словаря или индекса {options.dict} (python 4.py build-index), "
+                  f"используются встроенные слова")
+        game = Hangman(words if words is not None else WORDS)
+        game.select_word(options.length, options.difficulty)
+    except ValueError as error:
+        print(f"Ошибка: {error}")
+        return
+    game.play_game(options.length, options.difficulty)
+
+
 def main():
     """Точка входа в программу"""
-    game = Hangman()
+    try:
+        game = Hangman()
+    except ValueError as error:
+        print(f"{error}, используются встроенные слова")
+        game = Hangman(WORDS)
     game.play_game()
 
 if __name__ == "__main__":
-    main()
\ No newline at end of file
+    if len(sys.argv) > 1 and sys.argv[1] == "build-index":
+        index_command(sys.argv[2:])
+    elif len(sys.argv) > 1 and sys.argv[1] == "play":
+        play_command(sys.argv[2:])
+    else:
+        main()
\ No newline at end of file
@@ -0,0 +1,495 @@
+"""
+Сервер всех четырех игр на asyncio и генератор нагрузки
+
+Протокол строковый (UTF-8), одна команда - одна строка:
+
+    NEW <игра> [параметры]  puzzle15 [размер] | bulls [easy|medium|hard] | tictactoe |
+                            hangman [easy|medium|hard|длина слова]
+    MOVE <ход>              puzzle15: строка столбец; bulls: число;
+                            tictactoe: строка столбец; hangman: буква или слово
+    STATE                   текущее состояние партии
+    STATS                   число сессий, ходов и процессорное время сервера
+    QUIT                    завершение сессии
+
+Ответ - одна строка: "OK ..." (партия продолжается), "DONE ..." (партия
+окончена) или "ERR сообщение". Сессия без команд дольше idle-timeout
+закрывается.
+
+Запуск:
+    python server.py serve [--port 7777] [--idle-timeout 60]
+    python server.py load --sessions 1000 --turns 20 [--game all] [--spawn]
+    python server.py mem [--sessions 100000] [--baseline ревизия]
+"""
+import argparse
+import asyncio
+import copy
+import importlib.util
+import os
+import random
+import subprocess
+import sys
+import time
+from functools import lru_cache
+
+GAME_FILES = {'puzzle15': '1.py', 'bulls': '2.py', 'tictactoe': '3.py', 'hangman': '4.py'}
+DEFAULT_PORT = 7777
+
+
+@lru_cache(maxsize=None)
+def game_module(name):
+    """Модуль игры (файлы игр названы цифрами, поэтому загружаются по пути)"""
+    path = os.path.join(os.path.dirname(os.path.abspath(__file__)), GAME_FILES[name])
+    spec = importlib.util.spec_from_file_location(f'game_{name}', path)
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
+
+def raise_file_limit():
+    """Поднимает мягкий лимит открытых файлов до жесткого (тысячи соединений)"""
+    try:
+        import resource
+        soft, hard = resource.getrlimit(resource.RLIMIT_NOFILE)
+        if soft < hard:
+            resource.setrlimit(resource.RLIMIT_NOFILE, (hard, hard))
+    except (ImportError, ValueError, OSError):
+        pass
+
+
+class PuzzleSession:
+    """Партия в пятнашки: ход - координаты перемещаемой плитки"""
+
+    __slots__ = ('game',)
+
+    def __init__(self, args):
+        size = int(args[0]) if args else 4
+        if not 2 <= size <= 8:
+            raise ValueError("размер поля должен быть от 2 до 8")
+        self.game = game_module('puzzle15').Puzzle15(size)
+
+    @property
+    def over(self):
+        return self.game.is_solved()
+
+    def state(self):
+        return ' '.join(str(tile) for row in self.game.board for tile in row)
+
+    def move(self, args):
+        row, col = (int(arg) for arg in args)
+        if not self.game.move_tile(row, col):
+            raise ValueError("плитку нельзя переместить")
+        return self.state()
+
+
+class BullsSession:
+    """Партия в быки и коровы: ход - число, ответ - быки и коровы"""
+
+    __slots__ = ('game',)
+
+    def __init__(self, args):
+        difficulty = args[0] if args else 'medium'
+        module = game_module('bulls')
+        if difficulty not in module.DIFFICULTY_LENGTHS:
+            raise ValueError("сложность: easy, medium или hard")
+        self.game = module.BullsAndCows()
+        self.game.new_game(difficulty)
+
+    @property
+    def over(self):
+        return self.game.is_over
+
+    def state(self):
+        result = f"{len(self.game.secret_number)} {self.game.attempts} {self.game.max_attempts}"
+        return f"{result} {self.game.secret_number}" if self.over else result
+
+    def move(self, args):
+        bulls, cows, _ = self.game.submit_guess(args[0])
+        result = f"{bulls} {cows} {self.game.max_attempts - self.game.attempts}"
+        return f"{result} {self.game.secret_number}" if self.over else result
+
+
+class TicTacToeSession:
+    """Партия в крестики-нолики против компьютера (игрок - X, компьютер - O)"""
+
+    __slots__ = ('game',)
+
+    def __init__(self, args):
+        self.game = game_module('tictactoe').TicTacToe()
+        self.game.computer = 'O'
+
+    @property
+    def over(self):
+        return self.game.game_over
+
+    def state(self):
+        cells = ''.join(cell if cell != ' ' else '.' for row in self.game.board for cell in row)
+        if self.game.game_over:
+            return f"{cells} {self.game.winner or 'draw'}"
+        return cells
+
+    def move(self, args):
+        row, col = (int(arg) for arg in args)
+        if not self.game.make_move(row, col):
+            raise ValueError("клетка занята или вне поля")
+        if not self.game.game_over:
+            self.game.make_move(*self.game.computer_move())
+        return self.state()
+
+
+class HangmanSession:
+    """Партия в виселицу: ход - буква или слово"""
+
+    __slots__ = ('game',)
+
+    def __init__(self, args):
+        choice = args[0] if args else None
+        module = game_module('hangman')
+        if choice is not None and not choice.isdigit() and choice not in module.DIFFICULTY_LENGTHS:
+            raise ValueError("сложность: easy, medium, hard или длина слова")
+        self.game = module.Hangman()
+        if choice is not None and choice.isdigit():
+            self.game.select_word(length=int(choice))
+        else:
+            self.game.select_word(difficulty=choice)
+
+    @property
+    def over(self):
+        return self.game.game_over
+
+    def state(self):
+        game = self.game
+        masked = ''.join(letter if letter in game.guessed_letters else '_' for letter in game.word)
+        result = f"{masked} {game.attempts_left}"
+        return f"{result} {game.word}" if game.game_over else result
+
+    def move(self, args):
+        guess = ' '.join(args)
+        is_valid, error_msg = self.game.validate_guess(guess)
+        if not is_valid:
+            raise ValueError(error_msg)
+        self.game.process_guess(guess)
+        return self.state()
+
+
+SESSION_TYPES = {'puzzle15': PuzzleSession, 'bulls': BullsSession,
+                 'tictactoe': TicTacToeSession, 'hangman': HangmanSession}
+
+
+class Session:
+    """Состояние одного соединения: текущая партия и счетчики"""
+
+    __slots__ = ('number', 'game', 'turns', 'last_active')
+
+    def __init__(self, number):
+        self.number = number
+        self.game = None
+        self.turns = 0
+        self.last_active = time.monotonic()
+
+
+class GameServer:
+    """Сервер игр: одна сессия на соединение, все сессии в одном процессе"""
+
+    def __init__(self, idle_timeout=60.0):
+        self.idle_timeout = idle_timeout
+        self.sessions = {}
+        self.created = 0
+        self.turns = 0
+
+    def dispatch(self, session, line):
+        """
+        Выполнение одной команды
+
+        Returns:
+            str: строка ответа (None - закрыть соединение)
+        """
+        command, *args = line.split() or ['']
+        command = command.upper()
+        try:
+            if command == 'NEW':
+                if not args or args[0] not in SESSION_TYPES:
+                    return f"ERR игры: {', '.join(SESSION_TYPES)}"
+                session.game = SESSION_TYPES[args[0]](args[1:])
+                return f"OK {session.game.state()}"
+            if command == 'MOVE':
+                if session.game is None:
+                    return "ERR сначала NEW <игра>"
+                if session.game.over:
+                    return "ERR партия окончена, начните новую"
+                result = session.game.move(args)
+                session.turns += 1
+                self.turns += 1
+                return f"{'DONE' if session.game.over else 'OK'} {result}"
+            if command == 'STATE':
+                if session.game is None:
+                    return "ERR нет партии"
+                return f"{'DONE' if session.game.over else 'OK'} {session.game.state()}"
+            if command == 'STATS':
+                return (f"OK sessions={len(self.sessions)} turns={self.turns} "
+                        f"cpu={time.process_time():.3f}")
+            if command == 'QUIT':
+                return None
+            return "ERR команды: NEW, MOVE, STATE, STATS, QUIT"
+        except (ValueError, IndexError) as error:
+            return f"ERR {error or 'неверный ход'}"
+
+    async def handle(self, reader, writer):
+        """Обслуживание одного соединения"""
+        self.created += 1
+        session = Session(self.created)
+        self.sessions[session.number] = session
+        try:
+            while True:
+                try:
+                    line = await asyncio.wait_for(reader.readline(), self.idle_timeout)
+                except asyncio.TimeoutError:
+                    writer.write("ERR timeout\n".encode())
+                    break
+                if not line:
+                    break
+                session.last_active = time.monotonic()
+                response = self.dispatch(session, line.decode('utf-8', 'replace').strip())
+                if response is None:
+                    writer.write(b"BYE\n")
+                    break
+                writer.write((response + '\n').encode())
+                await writer.drain()
+        except ConnectionError:
+            pass
+        finally:
+            del self.sessions[session.number]
+            writer.close()
+
+    async def serve(self, host='127.0.0.1', port=DEFAULT_PORT):
+        server = await asyncio.start_server(self.handle, host, port, backlog=4096)
+        print(f"Сервер игр слушает {host}:{port}, таймаут простоя {self.idle_timeout:.0f} с")
+        async with server:
+            await server.serve_forever()
+
+
+def serve_command(args):
+    """Запуск сервера: python server.py serve [параметры]"""
+    parser = argparse.ArgumentParser(prog='server.py serve', description='Сервер игр')
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=DEFAULT_PORT)
+    parser.add_argument('--idle-timeout', type=float, default=60.0, help='секунд простоя до закрытия')
+    options = parser.parse_args(args)
+
+    raise_file_limit()
+    # Таблицы и модули готовим заранее, чтобы не задерживать первые ходы
+    for name in GAME_FILES:
+        game_module(name)
+    game_module('tictactoe').solved_table()
+    try:
+        asyncio.run(GameServer(options.idle_timeout).serve(options.host, options.port))
+    except KeyboardInterrupt:
+        print("\nСервер остановлен")
+
+
+def random_move(game, rng):
+    """Случайный ход для генератора нагрузки (недопустимые ходы тоже бывают)"""
+    if game == 'puzzle15':
+        return f"{rng.randrange(4)} {rng.randrange(4)}"
+    if game == 'bulls':
+        first = rng.choice('123456789')
+        return first + ''.join(rng.sample([d for d in '0123456789' if d != first], 3))
+    if game == 'tictactoe':
+        return f"{rng.randrange(3)} {rng.randrange(3)}"
+    return rng.choice('АБВГДЕЖЗИЙКЛМНОПРСТУФХЦЧШЩЪЫЬЭЮЯ')
+
+
+async def _client(host, port, game, turns, latencies, rng):
+    """Одна сессия генератора нагрузки: NEW и turns ходов, новая партия после окончания"""
+    reader, writer = await asyncio.open_connection(host, port)
+
+    async def request(line):
+        writer.write((line + '\n').encode())
+        await writer.drain()
+        return (await reader.readline()).decode()
+
+    await request(f"NEW {game}")
+    for _ in range(turns):
+        start = time.perf_counter()
+        response = await request(f"MOVE {random_move(game, rng)}")
+        latencies.append(time.perf_counter() - start)
+        if response.startswith('DONE'):
+            await request(f"NEW {game}")
+    await request("QUIT")
+    writer.close()
+
+
+async def _server_stats(host, port):
+    reader, writer = await asyncio.open_connection(host, port)
+    writer.write(b"STATS\n")
+    fields = dict(item.split('=') for item in (await reader.readline()).decode().split()[1:])
+    writer.close()
+    return float(fields['cpu'])
+
+
+async def run_load(host, port, sessions, turns, games, seed):
+    """
+    Нагрузка: sessions одновременных соединений по turns ходов
+
+    Returns:
+        dict: задержки ходов, время, процессорное время клиента и сервера
+    """
+    rng = random.Random(seed)
+    latencies = []
+    server_cpu = await _server_stats(host, port)
+    client_cpu = time.process_time()
+    start = time.perf_counter()
+    results = await asyncio.gather(*(
+        _client(host, port, games[i % len(games)], turns, latencies, random.Random(rng.getrandbits(64)))
+        for i in range(sessions)), return_exceptions=True)
+    elapsed = time.perf_counter() - start
+    client_cpu = time.process_time() - client_cpu
+    server_cpu = await _server_stats(host, port) - server_cpu
+    failed = [result for result in results if isinstance(result, Exception)]
+    return {'latencies': sorted(latencies), 'elapsed': elapsed, 'failed': failed,
+            'client_cpu': client_cpu, 'server_cpu': server_cpu}
+
+
+def load_command(args):
+    """Генератор нагрузки: python server.py load [параметры]"""
+    parser = argparse.ArgumentParser(prog='server.py load', description='Нагрузка на сервер игр')
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=DEFAULT_PORT)
+    parser.add_argument('--sessions', type=int, default=1000, help='одновременных соединений')
+    parser.add_argument('--turns', type=int, default=20, help='ходов на сессию')
+    parser.add_argument('--game', default='all', help=f"игра или all ({', '.join(GAME_FILES)})")
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--spawn', action='store_true', help='запустить сервер в отдельном процессе')
+    options = parser.parse_args(args)
+
+    raise_file_limit()
+    games = list(GAME_FILES) if options.game == 'all' else options.game.split(',')
+    server = None
+    if options.spawn:
+        server = subprocess.Popen([sys.executable, os.path.abspath(__file__), 'serve',
+                                   '--host', options.host, '--port', str(options.port)],
+                                  stdout=subprocess.DEVNULL)
+        deadline = time.monotonic() + 30
+        while True:
+            try:
+                asyncio.run(_server_stats(options.host, options.port))
+                break
+            except OSError:
+                if time.monotonic() > deadline or server.poll() is not None:
+                    server.kill()
+                    raise SystemExit("Сервер не запустился")
+                time.sleep(0.2)
+    try:
+        stats = asyncio.run(run_load(options.host, options.port, options.sessions,
+                                     options.turns, games, options.seed))
+    finally:
+        if server is not None:
+            server.terminate()
+            server.wait()
+
+    latencies = stats['latencies']
+    turns = len(latencies)
+
+    def percentile(q):
+        return latencies[min(turns - 1, int(q * turns))] * 1000 if turns else 0.0
+
+    print(f"Сессий: {options.sessions} ({', '.join(games)}), неудачных: {len(stats['failed'])}, "
+          f"ходов: {turns} за {stats['elapsed']:.2f} с ({turns / stats['elapsed']:.0f} ходов/с)")
+    print(f"Задержка хода, мс: p50 {percentile(0.5):.2f}, p90 {percentile(0.9):.2f}, "
+          f"p99 {percentile(0.99):.2f}, максимум {percentile(1.0):.2f}")
+    print(f"Процессор: сервер {stats['server_cpu']:.2f} с "
+          f"({stats['server_cpu'] / stats['elapsed']:.0%} ядра), клиент {stats['client_cpu']:.2f} с")
+    if stats['server_cpu'] > 0:
+        print(f"Оценка: {turns / stats['server_cpu']:.0f} ходов в секунду на ядро сервера")
+    if stats['failed']:
+        print(f"Первая ошибка: {stats['failed'][0]!r}")
+
+
+def session_memory(server, count):
+    """
+    Память на живую сессию каждой игры
+
+    Args:
+        server: модуль сервера (текущий или базовой версии из load_baseline)
+        count: сессий каждой игры
+
+    Returns:
+        dict: байт на сессию (вместе с Session и адаптером партии) по играм
+    """
+    import gc
+    import tracemalloc
+
+    result = {}
+    for name, session_type in server.SESSION_TYPES.items():
+        template = server.Session(0)
+        template.game = session_type([])
+        # Партии копируются с шаблона (создание каждой, например перемешивание
+        # пятнашек, заняло бы минуты); модули и общие таблицы не копируются
+        memo = {id(module): module for module in list(sys.modules.values())}
+        gc.collect()
+        tracemalloc.start()
+        before = tracemalloc.get_traced_memory()[0]
+        sessions = [copy.deepcopy(template, dict(memo)) for _ in range(count)]
+        result[name] = (tracemalloc.get_traced_memory()[0] - before) / count
+        tracemalloc.stop()
+        del sessions
+    return result
+
+
+def load_baseline(revision, directory):
+    """Сервер и игры из ревизии git (извлекаются в directory) для сравнения"""
+    root = os.path.dirname(os.path.abspath(__file__))
+    for file_name in ['server.py', *GAME_FILES.values()]:
+        content = subprocess.run(['git', 'show', f'{revision}:{file_name}'], cwd=root,
+                                 capture_output=True, check=True).stdout
+        with open(os.path.join(directory, file_name), 'wb') as f:
+            f.write(content)
+    spec = importlib.util.spec_from_file_location('baseline_server', os.path.join(directory, 'server.py'))
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
+
+def memory_command(args):
+    """Память на живую сессию каждой игры: python server.py mem [--sessions N] [--baseline ревизия]"""
+    import tempfile
+
+    parser = argparse.ArgumentParser(prog='server.py mem', description='Память на сессию')
+    parser.add_argument('--sessions', type=int, default=100000, help='сессий каждой игры')
+    parser.add_argument('--baseline', help='ревизия git для сравнения (например, коммит до оптимизации)')
+    options = parser.parse_args(args)
+
+    baseline = None
+    if options.baseline:
+        with tempfile.TemporaryDirectory() as directory:
+            try:
+                server = load_baseline(options.baseline, directory)
+            except subprocess.CalledProcessError as error:
+                print(f"Не удалось получить ревизию {options.baseline}: {error.stderr.decode().strip()}")
+                return
+            baseline = session_memory(server, options.sessions)
+    current = session_memory(sys.modules[__name__], options.sessions)
+
+    print(f"Сессий каждой игры: {options.sessions}")
+    if baseline is None:
+        print(f"{'Игра':>10} {'байт на сессию':>15} {'всего, МБ':>10}")
+        for name, size in current.items():
+            print(f"{name:>10} {size:15.0f} {size * options.sessions / 1024 / 1024:10.1f}")
+        return
+    print(f"Байт на сессию: {options.baseline} -> текущая версия")
+    print(f"{'Игра':>10} {'было':>8} {'стало':>8} {'доля':>7}")
+    for name, size in current.items():
+        if name in baseline:
+            print(f"{name:>10} {baseline[name]:8.0f} {size:8.0f} {size / baseline[name]:7.2f}")
+        else:
+            print(f"{name:>10} {'-':>8} {size:8.0f} {'-':>7}")
+
+
+if __name__ == "__main__":
+    if len(sys.argv) > 1 and sys.argv[1] == "serve":
+        serve_command(sys.argv[2:])
+    elif len(sys.argv) > 1 and sys.argv[1] == "load":
+        load_command(sys.argv[2:])
+    elif len(sys.argv) > 1 and sys.argv[1] == "mem":
+        memory_command(sys.argv[2:])
+    else:
+        print(__doc__)